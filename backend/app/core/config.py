@@ -1,7 +1,99 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     ELEVENLABS_API_KEY: str = "dummy_key_for_dev"
+    # Point at a local stand-in (tests/fake_stt_server.py) for load testing
+    ELEVENLABS_BASE_URL: Optional[str] = None
+
+    # Level of the app's loggers: DEBUG, INFO, WARNING or ERROR
+    LOG_LEVEL: str = "INFO"
+
+    # SDKs load on first use unless warmed at startup: "none", "background"
+    # (right after startup, off the event loop) or "blocking" (before serving)
+    WARM_UP: str = "none"
+
+    # Number of STT requests a single session may have in flight at once
+    STT_MAX_IN_FLIGHT: int = 3
+    # Requests the whole worker may have in flight, shared fairly by sessions
+    STT_MAX_CONCURRENCY: int = 32
+    STT_TIMEOUT: float = 60.0
+
+    # Cache of STT results keyed by audio content; set a directory to keep them on disk
+    STT_CACHE_ENABLED: bool = True
+    STT_CACHE_MAX_ENTRIES: int = 2048
+    STT_CACHE_TTL: float = 24 * 3600.0  # seconds
+    STT_CACHE_DIR: Optional[str] = None
+    STT_CACHE_MAX_DISK_ENTRIES: int = 100000
+
+    # Latency tier: "standard" sends finals only, "low" adds interim results
+    STT_LATENCY_MODE: str = "standard"
+    STT_INTERIM_INTERVAL: float = 0.75  # seconds of new audio between interim requests
+    STT_MAX_INTERIM_PER_SEGMENT: int = 4
+
+    # WebSocket framing: "word" (one message per word), "segment" or "batch"
+    WS_FRAMING: str = "word"
+    WS_BATCH_MAX_WORDS: int = 20
+    WS_BATCH_MAX_DELAY_MS: int = 200
+
+    # Ingest queue per connection: ~10 s of 16 kHz PCM
+    AUDIO_QUEUE_MAX_BYTES: int = 320000
+    AUDIO_QUEUE_POLICY: str = "block"  # block | drop_oldest | notify
+
+    # Live sessions survive a dropped connection for this long, keeping
+    # recent events for replay on resume
+    SESSION_RESUME_GRACE: float = 30.0  # seconds
+    SESSION_REPLAY_EVENTS: int = 2000
+
+    # State shared between workers: "memory://" for a single worker, or a
+    # redis:// URL so sessions resume and meetings broadcast on any worker
+    STATE_BACKEND_URL: str = "memory://"
+    # How long a worker waits for the one running a session to accept a resume
+    SESSION_RELAY_TIMEOUT: float = 2.0  # seconds
+    # Transcript events per meeting waiting to be published before the oldest are dropped
+    MEETING_PUBLISH_MAX_PENDING: int = 1000
+
+    # Read-only meeting viewers: messages buffered per viewer, what happens to
+    # one that falls behind, and how many recent segments a joiner catches up on
+    BROADCAST_SUBSCRIBER_BUFFER: int = 256
+    BROADCAST_SLOW_CONSUMER: str = "drop_oldest"  # drop_oldest | disconnect
+    BROADCAST_SNAPSHOT_SEGMENTS: int = 50
+
+    # Voice activity detection; disable to fall back to fixed 5 s windows
+    VAD_ENABLED: bool = True
+    VAD_ENERGY_THRESHOLD: float = 300.0  # frame RMS in int16 units
+    VAD_ZCR_THRESHOLD: float = 0.25
+    VAD_MIN_SEGMENT: float = 1.0  # seconds
+    VAD_MAX_SEGMENT: float = 10.0
+    VAD_MIN_PAUSE: float = 0.3
+
+    # Stable session-wide speaker ids across diarized segments
+    SPEAKER_TRACKING: bool = True
+    SPEAKER_MATCH_DISTANCE: float = 0.5  # voice fingerprint distance that still counts as a match
+
+    # Embedded SQLite store for meeting transcripts
+    TRANSCRIPT_DB_PATH: str = "transcripts.db"
+
+    # Offline transcription jobs: uploads are cut at pauses into chunks
+    # that are transcribed in parallel
+    JOBS_DIR: str = "jobs"
+    JOB_MAX_UPLOAD_BYTES: int = 2 * 1024 ** 3
+    JOB_CHUNK_DURATION: float = 60.0  # seconds
+    JOB_CHUNK_SEARCH: float = 10.0    # how far before the limit to look for a pause
+    JOB_CHUNK_OVERLAP: float = 3.0    # shared with the previous chunk, for speaker matching
+    JOB_MAX_CONCURRENCY: int = 8
+    JOB_RESULT_TTL: float = 24 * 3600.0  # seconds a finished job and its result file are kept
+
+    # Google Calendar; point the endpoint at a local fake server for testing
+    GOOGLE_CALENDAR_API_ENDPOINT: Optional[str] = None
+    GOOGLE_BATCH_CONCURRENCY: int = 4
+    GOOGLE_HTTP_TIMEOUT: float = 30.0
+
+    # Upcoming-meetings cache, refreshed by incremental sync once older than the TTL
+    CALENDAR_CACHE_PATH: str = "calendar_cache.json"
+    CALENDAR_CACHE_TTL: float = 60.0  # seconds
+    CALENDAR_REFRESH_BACKOFF: float = 5.0  # seconds after a failed background sync, doubling each time
+    CALENDAR_REFRESH_MAX_BACKOFF: float = 300.0
 
     class Config:
         env_file = ".env"
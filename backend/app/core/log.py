@@ -0,0 +1,77 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import parse_qs
+
+# Trace id of the request or WebSocket session being handled; tasks
+# started while handling it inherit it
+trace_id: ContextVar[str] = ContextVar("trace_id", default="-")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _TraceFilter(logging.Filter):
+    def filter(self, record):
+        record.trace_id = trace_id.get()
+        return True
+
+
+def setup_logging(level: str = "INFO"):
+    """
+    Route the app's loggers through a queue to a background thread, so
+    writing log lines never blocks the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"))
+
+    # The trace id is read here, on the thread that logged
+    handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    handler.addFilter(_TraceFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(level.upper())
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class TraceMiddleware:
+    """
+    Give every HTTP request and WebSocket session a trace id for its log
+    lines: the caller's X-Trace-Id header (or trace_id query parameter,
+    which browsers can set on a WebSocket), else a new one. HTTP responses
+    echo it back.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        trace = dict(scope["headers"]).get(b"x-trace-id", b"").decode("latin-1")
+        if not trace and scope["type"] == "websocket":
+            trace = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("trace_id", [""])[0]
+        trace = trace[:64] or uuid.uuid4().hex
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-trace-id", trace.encode("latin-1"))]
+            await send(message)
+
+        token = trace_id.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace if scope["type"] == "http" else send)
+        finally:
+            trace_id.reset(token)
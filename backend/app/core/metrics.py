@@ -0,0 +1,193 @@
+import bisect
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; spans a fast send up to a slow STT request
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics served at /metrics, by name; registering a name again replaces it
+REGISTRY: Dict[str, "_Metric"] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        REGISTRY[name] = self
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        return []
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labels, key)))} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Gauge read from function when /metrics is scraped, so keeping it
+    current costs nothing on the hot path.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, function: Callable[[], float]):
+        super().__init__(name, help)
+        self.function = function
+
+    def _samples(self):
+        try:
+            value = self.function()
+        except Exception:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class HistogramSeries:
+    """
+    Bucketed counts of observations, with quantiles estimated from them.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Linear interpolation within the bucket holding the q-th observation.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], HistogramSeries] = {}
+
+    def series(self, **labels) -> HistogramSeries:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = HistogramSeries(self.buckets)
+        return series
+
+    def observe(self, value: float, **labels):
+        self.series(**labels).observe(value)
+
+    def _samples(self):
+        lines = []
+        for key, series in self._series.items():
+            pairs = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {series.count}")
+        return lines
+
+
+def render() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in list(REGISTRY.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "transcription_stage_seconds",
+    "Time spent in each stage of live transcription: ingest, buffer_fill, stt_request, parse, send.",
+    ["stage"],
+)
+STT_REQUESTS = Counter("stt_requests_total", "Speech-to-text API requests by outcome.", ["outcome"])
+ERRORS = Counter("transcription_errors_total", "Errors by where they happened.", ["stage"])
+
+
+class StageTimings:
+    """
+    One session's stage timings. Each observation also counts towards
+    the app-wide transcription_stage_seconds histogram.
+    """
+    def __init__(self):
+        self._stages: Dict[str, HistogramSeries] = {}
+
+    def observe(self, stage: str, seconds: float):
+        series = self._stages.get(stage)
+        if series is None:
+            series = self._stages[stage] = HistogramSeries()
+        series.observe(seconds)
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: series.summary() for stage, series in self._stages.items()}
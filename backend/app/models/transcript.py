@@ -14,6 +14,18 @@ class TranscriptEvent(BaseModel):
     is_final: bool = False
     start: Optional[float] = None  # ADD
     end: Optional[float] = None    # ADD
+    seq: Optional[int] = None  # position in the session's event stream, for resume
+
+class TranscriptBatch(BaseModel):
+    type: str = "batch"
+    events: List[TranscriptEvent]
+    seq: Optional[int] = None
+
+class SessionEvent(BaseModel):
+    type: str  # "session" on a new connection, "resumed" on reconnect
+    session_id: str
+    last_seq: int  # newest event sent so far; replayed events follow a "resumed"
+    audio_offset: int  # bytes of audio received; resend anything after this
 
 class Word(BaseModel):
     text: str
@@ -27,3 +39,25 @@ class TranscriptSegment(BaseModel):
     start:float
     end:float   
     words: List[Word]     
+
+class MeetingSnapshot(BaseModel):
+    type: str = "snapshot"
+    meeting_id: str
+    segments: List[TranscriptSegment]  # recent finished speaker turns, oldest first
+    events: List[TranscriptEvent]  # final words of the segment still in progress
+
+class TranscriptionJob(BaseModel):
+    job_id: str
+    status: str  # "queued", "processing", "done" or "failed"
+    title: Optional[str] = None
+    created_at: str
+    duration: Optional[float] = None  # seconds of audio
+    chunks_total: int = 0
+    chunks_done: int = 0
+    error: Optional[str] = None
+
+class TranscriptionJobResult(BaseModel):
+    job_id: str
+    duration: float
+    text: str
+    segments: List[TranscriptSegment]
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
-from app.services.google_service import GoogleService
+import asyncio
+import importlib
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 router = APIRouter(
     prefix="/google-meet",
@@ -7,53 +9,192 @@ router = APIRouter(
 )
 
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
+from app.core.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
 class CreateMeetingRequest(BaseModel):
     summary: str = "New Meeting"
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    # Retrying with the same key returns the existing meeting
+    idempotency_key: Optional[str] = None
+
+class BatchCreateMeetingRequest(BaseModel):
+    meetings: List[CreateMeetingRequest] = Field(..., min_length=1, max_length=1000)
+
+# Built on first use: the Google client libraries take about half a second
+# to import, which workers that never serve these endpoints should not pay
+google_service = None
+upcoming_cache = None
+_load_lock = asyncio.Lock()
+
+def _import_services():
+    return (
+        importlib.import_module("app.services.google_service"),
+        importlib.import_module("app.services.calendar_cache"),
+    )
 
-google_service = GoogleService()
+async def load_services():
+    """
+    The Google service and upcoming meetings cache, importing them off
+    the event loop the first time.
+    """
+    global google_service, upcoming_cache
+    if upcoming_cache is None:
+        async with _load_lock:
+            if upcoming_cache is None:
+                google, calendar_cache = await asyncio.to_thread(_import_services)
+                google_service = google.GoogleService()
+                upcoming_cache = calendar_cache.UpcomingMeetingsCache(google_service)
+    return google_service, upcoming_cache
+
+def close():
+    if upcoming_cache is not None:
+        upcoming_cache.close()
+    if google_service is not None:
+        google_service.close()
 
 @router.post("/create")
-async def create_meeting(request: CreateMeetingRequest):
+async def create_meeting(request: CreateMeetingRequest, http_request: Request):
     """
     Create a new Google Meet meeting (Instant or Scheduled).
     """
     try:
+        google_service, _ = await load_services()
         result = await google_service.create_meeting(
             summary=request.summary,
             start_time=request.start_time,
-            end_time=request.end_time
+            end_time=request.end_time,
+            idempotency_key=request.idempotency_key
         )
-        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if result.get("id"):
+        await _register_meeting(http_request.app.state.transcript_store, result["id"], request.summary)
+    return result
+
+
+@router.post("/create/batch")
+async def create_meetings(request: BatchCreateMeetingRequest, http_request: Request):
+    """
+    Create many Google Meet meetings in batched Calendar API calls.
+    Returns one result per meeting, in request order.
+    """
+    try:
+        google_service, _ = await load_services()
+        results = await google_service.create_meetings([meeting.model_dump() for meeting in request.meetings])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    store = http_request.app.state.transcript_store
+    for meeting, result in zip(request.meetings, results):
+        result["idempotency_key"] = meeting.idempotency_key
+        if result.get("id"):
+            await _register_meeting(store, result["id"], meeting.summary)
+    return {"results": results}
+
+
+async def _register_meeting(store, meeting_id: str, title: str):
+    """
+    Register a created meeting so its live transcript is stored under the
+    event id with its title. The event already exists in Calendar, so a
+    store failure is logged rather than failing the request.
+    """
+    try:
+        await store.ensure_meeting(meeting_id, title)
+    except Exception as e:
+        logger.warning("Registering meeting %s failed: %s", meeting_id, e)
+        ERRORS.inc(stage="store")
+
+
+@router.get("/upcoming")
+async def list_upcoming(request: Request, limit: int = Query(20, ge=1, le=250)):
+    """
+    Upcoming meetings and their Meet links, served from the sync cache.
+    Send the returned ETag as If-None-Match to get 304 when nothing changed.
+    """
+    try:
+        _, upcoming_cache = await load_services()
+        body, etag = await upcoming_cache.get_upcoming(limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag (RFC 9110).
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
 
 @router.get("/transcript/{meeting_id}")
-async def get_transcript(meeting_id: str):
+async def get_transcript(
+    meeting_id: str,
+    request: Request,
+    speaker_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
     """
-    Get the transcript for a specific Google Meet meeting.
+    Get the stored transcript for a meeting, one page of segments at a time.
+    Filter by speaker and by a [start, end] time range in seconds.
     """
+    store = request.app.state.transcript_store
     try:
-        transcript = await google_service.get_transcript(meeting_id)
-        if not transcript:
+        meeting = await store.get_meeting(meeting_id)
+        if not meeting:
             raise HTTPException(status_code=404, detail="Transcript not found")
-        return transcript
+        segments = await store.get_segments(meeting_id, speaker_id, start, end, offset, limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return {
+        "meeting_id": meeting_id,
+        "title": meeting["title"],
+        "date": meeting["created_at"][:10],
+        "segments": segments,
+        "offset": offset,
+        "next_offset": offset + limit if len(segments) == limit else None,
+    }
+
 @router.get("/recordings")
-async def list_recordings():
+async def list_recordings(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
     """
-    List available recordings/meetings from Google Drive (Mocked).
+    List meetings with stored transcripts, most recently updated first.
     """
     try:
-        recordings = await google_service.list_recordings()
-        return recordings
+        meetings = await request.app.state.transcript_store.list_meetings(offset, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    return [
+        {
+            "id": meeting["meeting_id"],
+            "title": meeting["title"],
+            "date": meeting["created_at"][:10],
+            "segment_count": meeting["segment_count"],
+        }
+        for meeting in meetings
+    ]
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"]
+)
+
+@router.get("")
+async def search_transcripts(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    meeting_id: Optional[str] = None,
+    speaker_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """
+    Search stored transcripts for segments containing every word of q.
+    start/end filter by time within the meeting (seconds); since/until
+    filter by meeting date (ISO 8601).
+    """
+    try:
+        hits = await request.app.state.transcript_store.search(
+            q, meeting_id, speaker_id, start, end, since, until, offset, limit
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "query": q,
+        "hits": hits,
+        "offset": offset,
+        "next_offset": offset + limit if len(hits) == limit else None,
+    }
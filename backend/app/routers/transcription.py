@@ -1,17 +1,206 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse
+from app.core import metrics
+from app.core.config import settings
+from app.models.transcript import TranscriptBatch, TranscriptEvent
+from app.services.audio_decoder import CODECS, decode_stream, decoder_available
+from app.services.audio_queue import AudioQueue, OVERFLOW_POLICIES
 from app.services.elevenlabs_service import ElevenLabsService
+from app.services.event_framing import FRAMINGS, batch_events
+from app.services.live_session import LiveSession
+from app.services.meeting_channel import MeetingPublisher
+from app.services.transcript_store import TranscriptRecorder
+from app.services.transcription_jobs import UploadTooLarge
+from typing import Dict, Optional
 import asyncio
+import json
+import os
+import time
 
 router = APIRouter()
 
+# Live sessions on this worker, keyed by session id
+active_sessions: Dict[str, LiveSession] = {}
+
+# A client is finished when it closes the socket with 1000 or sends
+# {"type": "end"}; any other disconnect, including a drop with no close
+# frame (1005, 1006), keeps the session open for a resume
+CLEAN_CLOSE_CODE = 1000
+
+metrics.Gauge("transcription_sessions_active", "Live sessions on this worker.", lambda: len(active_sessions))
+metrics.Gauge(
+    "transcription_sessions_connected",
+    "Live sessions with a client attached.",
+    lambda: sum(session.websocket is not None for session in active_sessions.values()),
+)
+metrics.Gauge(
+    "transcription_segments_in_flight",
+    "Segments awaiting STT results across live sessions.",
+    lambda: sum(session.service.in_flight for session in active_sessions.values()),
+)
+metrics.Gauge(
+    "transcription_backlog_seconds",
+    "Seconds of audio awaiting STT results across live sessions.",
+    lambda: sum(session.service.backlog_seconds for session in active_sessions.values()),
+)
+
+@router.get("/transcribe/sessions")
+async def list_sessions():
+    """
+    Per-connection ingest, backlog and stage latency metrics for live sessions.
+    """
+    return [
+        {
+            "session_id": session_id,
+            "connected": session.websocket is not None,
+            "last_seq": session.last_seq,
+            **session.audio_queue.stats(),
+            "in_flight": session.service.in_flight,
+            "backlog_seconds": session.service.backlog_seconds,
+            "stages": session.service.timings.summary(),
+        }
+        for session_id, session in active_sessions.items()
+    ]
+
+@router.get("/transcribe/cache")
+async def cache_stats(request: Request):
+    """
+    Hit and miss counters of the STT result cache.
+    """
+    cache = request.app.state.stt_cache
+    return cache.stats() if cache is not None else {"enabled": False}
+
+@router.post("/transcribe/jobs", status_code=202)
+async def create_job(request: Request, codec: str = "auto", title: Optional[str] = None):
+    """
+    Transcribe a recorded meeting. Send the file as the raw request body;
+    codec is "pcm_s16le_16" for raw 16 kHz PCM, otherwise the container
+    is detected. Poll the returned job for status.
+    """
+    if codec != "pcm_s16le_16" and not decoder_available():
+        raise HTTPException(status_code=415, detail="Only pcm_s16le_16 uploads are supported")
+    try:
+        return await request.app.state.transcription_jobs.create(request.stream(), codec, title)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@router.get("/transcribe/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    job = request.app.state.transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/transcribe/jobs/{job_id}/result")
+async def get_job_result(job_id: str, request: Request):
+    """
+    Diarized transcript of a finished job.
+    """
+    jobs = request.app.state.transcription_jobs
+    path = jobs.result_path(job_id)
+    if not os.path.exists(path):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(path, media_type="application/json")
+
 @router.websocket("/ws/transcribe")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    service = ElevenLabsService()
-    
-    # Queue to hold audio chunks from client
-    audio_queue = asyncio.Queue()
-    
+
+    # A client reconnecting after a dropped connection picks its session back up,
+    # relayed from the worker running it if that is not this one;
+    # an unknown or expired id starts a new session
+    session_id = websocket.query_params.get("session_id", "")
+    try:
+        last_seq = int(websocket.query_params.get("last_seq", -1))
+    except ValueError:
+        last_seq = -1
+    session = active_sessions.get(session_id)
+    if session is not None:
+        await session.attach(websocket, last_seq, resumed=True)
+    elif session_id and await websocket.app.state.sessions.relay(websocket, session_id, last_seq):
+        return
+    else:
+        session = await start_session(websocket)
+        if session is None:
+            return
+        await session.attach(websocket)
+
+    await receive_audio(websocket, session)
+
+@router.websocket("/ws/meetings/{meeting_id}")
+async def watch_meeting(websocket: WebSocket, meeting_id: str):
+    """
+    Read-only live transcript of a meeting, for any number of viewers:
+    a snapshot of recent segments, then events as they are transcribed.
+    """
+    await websocket.accept()
+    broadcast = websocket.app.state.broadcast
+    subscriber = await broadcast.subscribe(meeting_id)
+
+    async def watch_disconnect():
+        # Viewers send nothing; this only notices them leaving
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            subscriber.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        async for message in subscriber:
+            await websocket.send_text(message)
+        # Too slow to keep up: rejoin for a fresh snapshot
+        await websocket.close(code=1013 if subscriber.evicted else 1001)
+    except Exception:
+        pass  # the viewer is gone
+    finally:
+        watcher.cancel()
+        await broadcast.unsubscribe(meeting_id, subscriber)
+
+async def serve_remote(connection, session: LiveSession, last_seq: int):
+    """
+    Resume a session on this worker for a client connected to another one.
+    """
+    await session.attach(connection, last_seq, resumed=True)
+    await receive_audio(connection, session)
+
+async def start_session(websocket: WebSocket) -> Optional[LiveSession]:
+    # Audio codec is negotiated at connect time; compressed audio is decoded to PCM
+    codec = websocket.query_params.get("codec", "pcm_s16le_16")
+    if codec not in CODECS or (CODECS[codec] is not None and not decoder_available()):
+        await websocket.send_text(TranscriptEvent(type="error", text=f"Unsupported codec: {codec}").model_dump_json())
+        await websocket.close(code=1003)
+        return None
+
+    service = ElevenLabsService(websocket.app.state.stt_pool, websocket.app.state.stt_cache)
+
+    # Clients may opt into interim results per connection
+    latency = websocket.query_params.get("latency")
+    if latency in ("standard", "low"):
+        service.latency_mode = latency
+
+    # Message framing: one word per message, one per segment, or batched
+    framing = websocket.query_params.get("framing", settings.WS_FRAMING)
+    if framing not in FRAMINGS:
+        framing = settings.WS_FRAMING
+
+    # Bounded queue to hold audio chunks from client
+    policy = websocket.query_params.get("overflow", settings.AUDIO_QUEUE_POLICY)
+    if policy not in OVERFLOW_POLICIES:
+        policy = settings.AUDIO_QUEUE_POLICY
+    audio_queue = AudioQueue(settings.AUDIO_QUEUE_MAX_BYTES, policy)
+
+    # Final segments are saved under the meeting id, or the session id if none is given
+    meeting_id = websocket.query_params.get("meeting_id") or service.session_id
+    recorder = TranscriptRecorder(websocket.app.state.transcript_store, meeting_id)
+
+    # Viewers on any worker follow the meeting through the state backend
+    publisher = MeetingPublisher(websocket.app.state.state_backend, meeting_id)
+    registry = websocket.app.state.sessions
+
     async def audio_generator():
         while True:
             chunk = await audio_queue.get()
@@ -19,36 +208,90 @@ async def websocket_endpoint(websocket: WebSocket):
                 break
             yield chunk
 
-    # Task to receive from client
-    async def receive_from_client():
-        try:
-            while True:
-                # Expecting raw bytes from client microphone
-                data = await websocket.receive_bytes()
-                await audio_queue.put(data)
-        except WebSocketDisconnect:
-            await audio_queue.put(None)
-        except Exception:
-            await audio_queue.put(None)
-
-    # Task to process with ElevenLabs
-    async def process_transcription():
-        try:
-            async for transcript_event in service.transcribe_stream(audio_generator()):
-                await websocket.send_json(transcript_event.dict())
-        except Exception as e:
-            print(f"Processing error: {e}")
-            # Try to send error to client
-            # await websocket.send_json({"type": "error", "message": str(e)})
-
-    # Run both
-    receive_task = asyncio.create_task(receive_from_client())
-    process_task = asyncio.create_task(process_transcription())
-    
-    await asyncio.wait([receive_task, process_task], return_when=asyncio.FIRST_COMPLETED)
-    
-    # Cleanup
-    if not receive_task.done():
-        receive_task.cancel()
-    if not process_task.done():
-        process_task.cancel()
+    def pcm_stream():
+        if CODECS[codec] is None:
+            return audio_generator()
+        return decode_stream(audio_generator(), codec, service.sample_rate)
+
+    # Transcription with ElevenLabs, framed for sending
+    async def messages():
+        events = publisher.publish(recorder.record(service.transcribe_stream(pcm_stream())))
+        if framing == "word":
+            async for transcript_event in events:
+                yield transcript_event
+        else:
+            if framing == "batch":
+                batches = batch_events(
+                    events,
+                    max_words=settings.WS_BATCH_MAX_WORDS,
+                    max_delay=settings.WS_BATCH_MAX_DELAY_MS / 1000,
+                )
+            else:
+                batches = batch_events(events)
+            async for batch in batches:
+                yield TranscriptBatch(events=batch)
+
+    def on_close(session: LiveSession):
+        active_sessions.pop(session.session_id, None)
+        registry.unregister(session)
+
+    session = LiveSession(service, audio_queue, on_close=on_close)
+    active_sessions[session.session_id] = session
+    await registry.register(session, meeting_id)
+    session.start(messages())
+    return session
+
+def is_end_of_stream(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+async def receive_audio(websocket, session: LiveSession):
+    """
+    Feed audio from this connection into the session until it disconnects.
+    websocket is a WebSocket, or a connection relayed from another worker.
+    """
+    audio_queue = session.audio_queue
+    timings = session.service.timings
+    slowed_down = False
+    ended = False
+    try:
+        while True:
+            # Expecting raw bytes from client microphone
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1005))
+            if session.websocket is not websocket:
+                return  # a newer connection has taken over the session
+            if message.get("text") is not None:
+                # The client is done sending but stays for the rest of the transcript
+                if not ended and is_end_of_stream(message["text"]):
+                    ended = True
+                    session.end()
+                continue
+            data = message.get("bytes")
+            if ended or not data:
+                continue
+            started = time.perf_counter()
+            session.audio_offset += len(data)
+
+            # Ask the client to back off while the queue is full
+            if not slowed_down and audio_queue.should_slow_down(len(data)):
+                slowed_down = True
+                await session.send_control(TranscriptEvent(type="backpressure", text="slow_down"))
+
+            await audio_queue.put(data)
+
+            if slowed_down and audio_queue.depth_bytes <= audio_queue.max_bytes // 2:
+                slowed_down = False
+                await session.send_control(TranscriptEvent(type="backpressure", text="resume"))
+            timings.observe("ingest", time.perf_counter() - started)
+    except WebSocketDisconnect as e:
+        if e.code == CLEAN_CLOSE_CODE and session.websocket is websocket:
+            # The client is done: finish transcribing what was sent
+            session.end()
+        else:
+            session.detach(websocket)
+    except Exception:
+        session.detach(websocket)
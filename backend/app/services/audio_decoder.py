@@ -0,0 +1,126 @@
+import asyncio
+import io
+import threading
+from typing import AsyncGenerator, AsyncIterable, Optional
+
+# Codecs accepted on /ws/transcribe, mapped to the demuxer that reads them
+CODECS = {
+    "pcm_s16le_16": None,  # raw 16-bit PCM at 16 kHz, no decoding
+    "opus": "ogg",         # Ogg Opus (Firefox MediaRecorder, opusenc)
+    "webm": "webm",        # WebM Opus (Chrome MediaRecorder)
+    "flac": "flac",
+}
+
+def decoder_available() -> bool:
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    Blocking file interface for the decoder thread that pulls the next
+    compressed chunk from the event loop on demand.
+    """
+    def __init__(self, chunks: AsyncIterable[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer and not self._eof:
+            future = asyncio.run_coroutine_threadsafe(self._next(), self._loop)
+            chunk = future.result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = chunk
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    async def _next(self) -> Optional[bytes]:
+        try:
+            return await anext(self._chunks)
+        except StopAsyncIteration:
+            return None
+
+
+async def decode_stream(
+    chunks: AsyncIterable[bytes],
+    codec: str,
+    sample_rate: int = 16000,
+) -> AsyncGenerator[bytes, None]:
+    """
+    Decode a compressed audio stream to mono 16-bit PCM.
+
+    Demuxing and decoding run on a dedicated thread that pulls compressed
+    chunks from `chunks` as it needs them and hands PCM back through a
+    small bounded queue, so a slow consumer pushes back on the reader.
+    """
+    import av
+
+    loop = asyncio.get_running_loop()
+    output: asyncio.Queue = asyncio.Queue(maxsize=8)
+    stop = threading.Event()
+
+    def _put(item):
+        if not stop.is_set():
+            asyncio.run_coroutine_threadsafe(output.put(item), loop).result()
+
+    def _decode():
+        try:
+            container = av.open(_ChunkReader(chunks, loop), mode="r", format=CODECS[codec])
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+            with container:
+                for frame in container.decode(audio=0):
+                    for pcm in resampler.resample(frame):
+                        _put(bytes(pcm.planes[0])[:pcm.samples * 2])
+                    if stop.is_set():
+                        return
+                for pcm in resampler.resample(None):
+                    _put(bytes(pcm.planes[0])[:pcm.samples * 2])
+            _put(None)
+        except Exception as e:
+            _put(e)
+
+    thread = threading.Thread(target=_decode, name=f"decode-{codec}", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = await output.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock the thread if it is waiting to hand over PCM
+        stop.set()
+        while not output.empty():
+            output.get_nowait()
+
+
+def decode_file(path: str, out_path: str, sample_rate: int = 16000):
+    """
+    Decode an audio file in any container PyAV recognises to a raw file
+    of mono 16-bit PCM. Blocking; run it on a thread.
+    """
+    import av
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    with av.open(path, mode="r") as container, open(out_path, "wb") as out:
+        for frame in container.decode(audio=0):
+            for pcm in resampler.resample(frame):
+                out.write(bytes(pcm.planes[0])[:pcm.samples * 2])
+        for pcm in resampler.resample(None):
+            out.write(bytes(pcm.planes[0])[:pcm.samples * 2])
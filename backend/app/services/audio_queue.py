@@ -0,0 +1,91 @@
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "notify")
+
+class AudioQueue:
+    """
+    Byte-budgeted queue between the WebSocket reader and the transcriber.
+
+    Overflow policies:
+      block       - put() waits until there is room (TCP pushes back on the client)
+      drop_oldest - the oldest queued audio is discarded to make room
+      notify      - like block, and should_slow_down() tells the caller to
+                    ask the client to slow down
+    """
+    def __init__(self, max_bytes: int, policy: str = "block"):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        self._chunks = deque()
+        self._closed = False
+        self._changed = asyncio.Condition()
+
+        # Per-connection metrics
+        self.depth_bytes = 0
+        self.peak_bytes = 0
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def should_slow_down(self, size: int) -> bool:
+        """
+        True when the notify policy is active and a chunk of this size would block.
+        """
+        return self.policy == "notify" and bool(self._chunks) and self.depth_bytes + size > self.max_bytes
+
+    async def put(self, chunk: bytes):
+        async with self._changed:
+            if self.policy == "drop_oldest":
+                while self._chunks and self.depth_bytes + len(chunk) > self.max_bytes:
+                    dropped = self._chunks.popleft()
+                    self.depth_bytes -= len(dropped)
+                    self.dropped_bytes += len(dropped)
+                    self.dropped_chunks += 1
+            else:
+                # A single oversized chunk is still let through on its own
+                await self._changed.wait_for(
+                    lambda: self._closed or not self._chunks or self.depth_bytes + len(chunk) <= self.max_bytes
+                )
+            if self._closed:
+                return
+
+            self._chunks.append(chunk)
+            self.depth_bytes += len(chunk)
+            self.peak_bytes = max(self.peak_bytes, self.depth_bytes)
+            self._changed.notify_all()
+
+    async def get(self) -> Optional[bytes]:
+        """
+        Return the next chunk, or None once the queue is closed and drained.
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._chunks or self._closed)
+            if not self._chunks:
+                return None
+            chunk = self._chunks.popleft()
+            self.depth_bytes -= len(chunk)
+            self._changed.notify_all()
+            return chunk
+
+    async def close(self):
+        """
+        Mark the end of the stream; queued audio is still delivered.
+        """
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            "queue_bytes": self.depth_bytes,
+            "queue_chunks": len(self._chunks),
+            "peak_queue_bytes": self.peak_bytes,
+            "dropped_bytes": self.dropped_bytes,
+            "dropped_chunks": self.dropped_chunks,
+        }
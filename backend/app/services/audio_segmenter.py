@@ -0,0 +1,349 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+def _noop():
+    pass
+
+
+class AudioSegment(NamedTuple):
+    audio: memoryview  # or any bytes-like object
+    start_sample: int  # absolute position of the first sample in the stream
+    release: Callable[[], None] = _noop  # call once the audio is no longer read
+
+
+class PcmRingBuffer:
+    """
+    Preallocated PCM buffer addressed by absolute stream byte positions.
+
+    Audio is copied in once; segments are handed out as memoryviews into
+    the buffer and overlap is kept by moving an index, not by copying.
+    Leased segments are never overwritten: when the write position reaches
+    the end, the held audio moves back to the front, or to a fresh buffer
+    if leased segments still occupy the front.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._lo = 0    # buffer index of the oldest held byte
+        self._hi = 0    # buffer index one past the newest byte
+        self.head = 0   # stream position of the oldest held byte
+
+        self._leases: Dict[int, Tuple[int, int]] = {}  # buffer index ranges still being read
+        self._next_lease = 0
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    @property
+    def tail(self) -> int:
+        """Stream position one past the newest byte."""
+        return self.head + self._hi - self._lo
+
+    def write(self, chunk: bytes):
+        size = len(chunk)
+        if self._hi + size > self.capacity or self._leased(self._hi, self._hi + size):
+            self._relocate(size)
+        self._view[self._hi:self._hi + size] = chunk
+        self._hi += size
+
+    def view(self, start: int, end: int) -> memoryview:
+        """
+        Zero-copy view of held audio; valid until the next write.
+        """
+        offset = self._lo - self.head
+        return self._view[start + offset:end + offset]
+
+    def lease(self, start: int, end: int) -> AudioSegment:
+        """
+        Hand out held audio as a segment that stays intact until released.
+        """
+        offset = self._lo - self.head
+        lease_id = self._next_lease
+        self._next_lease += 1
+        self._leases[lease_id] = (start + offset, end + offset)
+        return AudioSegment(
+            self._view[start + offset:end + offset],
+            start // 2,
+            lambda: self._leases.pop(lease_id, None),
+        )
+
+    def discard_until(self, position: int):
+        """
+        Drop held audio before a stream position.
+        """
+        position = min(max(position, self.head), self.tail)
+        self._lo += position - self.head
+        self.head = position
+
+    def _leased(self, lo: int, hi: int) -> bool:
+        return any(lease_lo < hi and lo < lease_hi for lease_lo, lease_hi in self._leases.values())
+
+    def _relocate(self, incoming: int):
+        held = self._hi - self._lo
+        needed = held + incoming
+        if needed > self.capacity or self._leased(0, needed):
+            # The old buffer lives on until its leased views are released
+            self.capacity = max(self.capacity, needed)
+            buf = bytearray(self.capacity)
+            view = memoryview(buf)
+            view[:held] = self._view[self._lo:self._hi]
+            self._buf, self._view = buf, view
+            self._leases = {}
+        else:
+            self._view[:held] = self._view[self._lo:self._hi]
+        self._lo, self._hi = 0, held
+
+
+class FixedSegmenter:
+    """
+    Cut 16-bit PCM into fixed-size buffers that share a short overlap.
+    Up to max_in_flight segments may be held by the caller at once.
+    """
+    def __init__(self, sample_rate: int, buffer_duration: float, overlap_duration: float, max_in_flight: int = 1):
+        self.sample_rate = sample_rate
+        self.buffer_size = int(buffer_duration * sample_rate) * 2
+        self.overlap_size = int(overlap_duration * sample_rate) * 2
+
+        # Room for the open buffer, the ones handed out and a chunk arriving
+        # as the write position wraps, so the front is free again by then
+        self._ring = PcmRingBuffer((max_in_flight + 2) * self.buffer_size)
+
+    @property
+    def open_start(self) -> Optional[int]:
+        """Start sample of the segment still being filled."""
+        return self._ring.head // 2
+
+    @property
+    def open_duration(self) -> float:
+        return len(self._ring) / 2 / self.sample_rate
+
+    def lease_open(self) -> AudioSegment:
+        return self._ring.lease(self._ring.head, self._ring.tail)
+
+    def feed(self, chunk: bytes) -> List[AudioSegment]:
+        self._ring.write(chunk)
+        if len(self._ring) < self.buffer_size:
+            return []
+
+        segment = self._ring.lease(self._ring.head, self._ring.tail)
+
+        # Keep overlap for next buffer
+        self._ring.discard_until(self._ring.tail - self.overlap_size)
+        return [segment]
+
+    def flush(self) -> Optional[AudioSegment]:
+        if len(self._ring) <= self.overlap_size:
+            return None
+        segment = self._ring.lease(self._ring.head, self._ring.tail)
+        self._ring.discard_until(self._ring.tail)
+        return segment
+
+
+class VadSegmenter:
+    """
+    Energy/zero-crossing voice activity detection over 16-bit PCM.
+    Silent spans are dropped and segments are cut at pauses, within
+    min_segment/max_segment seconds. Segments cut at max_segment carry
+    overlap_duration of audio into the next one so words are not split.
+    Up to max_in_flight segments may be held by the caller at once.
+    """
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        energy_threshold: float = 300.0,
+        zcr_threshold: float = 0.25,
+        min_segment: float = 1.0,
+        max_segment: float = 10.0,
+        min_pause: float = 0.3,
+        overlap_duration: float = 0.5,
+        frame_duration: float = 0.03,
+        padding: float = 0.2,
+        min_speech: float = 0.15,
+        flush_pause: float = 2.0,
+        max_in_flight: int = 1,
+    ):
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+
+        # Everything below is counted in frames or bytes
+        self.frame_samples = int(frame_duration * sample_rate)
+        self.frame_bytes = self.frame_samples * 2
+        self.min_segment_bytes = int(min_segment * sample_rate) * 2
+        self.max_segment_bytes = int(max_segment * sample_rate) * 2
+        self.overlap_size = int(overlap_duration * sample_rate) * 2
+        self.min_pause_frames = max(1, round(min_pause / frame_duration))
+        self.flush_pause_frames = max(self.min_pause_frames, round(flush_pause / frame_duration))
+        self.padding_bytes = round(padding / frame_duration) * self.frame_bytes
+        self.min_speech_frames = max(1, round(min_speech / frame_duration))
+
+        # Room for the open segment, the ones handed out and a chunk arriving
+        # as the write position wraps, so the front is free again by then
+        self._ring = PcmRingBuffer((max_in_flight + 2) * (self.max_segment_bytes + self.overlap_size))
+        self._analyzed = 0              # stream position of the next unclassified frame
+        self._noise_floor = 0.0
+
+        self._segment_start: Optional[int] = None
+        self._speech_frames = 0
+        self._silence_run = 0
+
+    @property
+    def open_start(self) -> Optional[int]:
+        """Start sample of the open speech segment, if any."""
+        if self._segment_start is None:
+            return None
+        return self._segment_start // 2
+
+    @property
+    def open_duration(self) -> float:
+        if self._segment_start is None:
+            return 0.0
+        return (self._analyzed - self._segment_start) / 2 / self.sample_rate
+
+    def lease_open(self) -> AudioSegment:
+        return self._ring.lease(self._segment_start, self._analyzed)
+
+    def feed(self, chunk: bytes) -> List[AudioSegment]:
+        self._ring.write(chunk)
+        n_frames = (self._ring.tail - self._analyzed) // self.frame_bytes
+        if not n_frames:
+            return []
+
+        block = self._ring.view(self._analyzed, self._analyzed + n_frames * self.frame_bytes)
+        frames = np.frombuffer(block, dtype=np.int16).reshape(n_frames, self.frame_samples)
+        speech = self._classify(frames)
+
+        segments = []
+        for is_speech in speech.tolist():
+            segment = self._step(is_speech)
+            if segment is not None:
+                segments.append(segment)
+
+        # Hold only the open segment, or a little pre-roll while idle
+        if self._segment_start is not None:
+            self._ring.discard_until(self._segment_start)
+        else:
+            self._ring.discard_until(self._analyzed - self.padding_bytes)
+        return segments
+
+    def flush(self) -> Optional[AudioSegment]:
+        if self._segment_start is None:
+            return None
+        return self._close()
+
+    def _classify(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Label each frame as speech or silence, vectorized over the block.
+        """
+        samples = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_samples - 1)
+
+        # Loud frames are speech; quieter frames count only when they are
+        # noisy enough to be unvoiced consonants.
+        threshold = max(self.energy_threshold, self._noise_floor * 3.0)
+        speech = (rms >= threshold) | ((rms >= threshold * 0.5) & (zcr >= self.zcr_threshold))
+
+        # Track the background level so steady noise does not read as speech
+        quiet = rms[~speech]
+        if quiet.size:
+            self._noise_floor = 0.95 * self._noise_floor + 0.05 * float(np.median(quiet))
+        return speech
+
+    def _step(self, is_speech: bool) -> Optional[AudioSegment]:
+        frame_start = self._analyzed
+        self._analyzed += self.frame_bytes
+
+        if self._segment_start is None:
+            if not is_speech:
+                return None
+
+            # Speech onset: open a segment with a little pre-roll
+            self._segment_start = max(self._ring.head, frame_start - self.padding_bytes)
+            self._speech_frames = 0
+            self._silence_run = 0
+
+        if is_speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        length = self._analyzed - self._segment_start
+        if self._silence_run >= self.min_pause_frames and (
+            length >= self.min_segment_bytes or self._silence_run >= self.flush_pause_frames
+        ):
+            return self._close()
+        if length >= self.max_segment_bytes:
+            return self._split()
+        return None
+
+    def _close(self) -> Optional[AudioSegment]:
+        """
+        End the open segment at a pause, trimming trailing silence.
+        """
+        trailing = max(0, self._silence_run * self.frame_bytes - self.padding_bytes)
+        start, end = self._segment_start, self._analyzed - trailing
+        speech_frames = self._speech_frames
+
+        self._segment_start = None
+        self._speech_frames = 0
+        self._silence_run = 0
+
+        # Too little speech to be worth a request (clicks, bumps)
+        if speech_frames < self.min_speech_frames:
+            return None
+        return self._ring.lease(start, end)
+
+    def _split(self) -> AudioSegment:
+        """
+        Cut a segment that reached max_segment, keeping overlap open.
+        """
+        segment = self._ring.lease(self._segment_start, self._analyzed)
+        self._segment_start = self._analyzed - self.overlap_size
+        self._speech_frames = 0
+        return segment
+
+
+def silence_cuts(
+    samples: np.ndarray,
+    sample_rate: int,
+    chunk_duration: float,
+    search_duration: float,
+    frame_duration: float = 0.03,
+) -> List[int]:
+    """
+    Sample positions that split a whole recording into chunks of at most
+    chunk_duration, each cut at the quietest stretch within the last
+    search_duration seconds before the limit.
+    """
+    frame_samples = int(sample_rate * frame_duration)
+    frame_count = len(samples) // frame_samples
+
+    # Frame energy, a block at a time so long recordings stay out of memory
+    energy = np.empty(frame_count, dtype=np.float32)
+    block = 10000
+    for first in range(0, frame_count, block):
+        count = min(block, frame_count - first)
+        frames = np.asarray(
+            samples[first * frame_samples:(first + count) * frame_samples], dtype=np.float32
+        ).reshape(count, frame_samples)
+        energy[first:first + count] = np.sqrt(np.mean(frames * frames, axis=1))
+
+    # Smooth over a short pause so a single quiet frame inside a word loses
+    width = max(1, int(0.3 / frame_duration))
+    energy = np.convolve(energy, np.ones(width, dtype=np.float32) / width, mode="same")
+
+    chunk_frames = int(chunk_duration / frame_duration)
+    search_frames = max(1, min(int(search_duration / frame_duration), chunk_frames - 1))
+    cuts = []
+    position = 0
+    while position + chunk_frames < frame_count:
+        lo = position + chunk_frames - search_frames
+        position = lo + int(np.argmin(energy[lo:position + chunk_frames]))
+        cuts.append(position * frame_samples)
+    return cuts
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models.transcript import MeetingSnapshot, TranscriptEvent, Word
+from app.services.meeting_channel import meeting_channel
+from app.services.state_backend import StateBackend, Subscription
+from app.services.transcript_store import TranscriptRecorder, TranscriptStore
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+
+DROPPED = Counter("broadcast_dropped_total", "Messages dropped for meeting viewers that fell behind.")
+EVICTED = Counter("broadcast_evicted_total", "Meeting viewers disconnected for falling behind.")
+
+class Subscriber:
+    """
+    One viewer's bounded buffer of messages, already serialized.
+
+    A viewer that falls max_buffer messages behind either loses the oldest
+    (and is told how many with a "lagged" event) or, with the "disconnect"
+    policy, is evicted so it can rejoin from a fresh snapshot.
+    """
+    def __init__(self, max_buffer: int, policy: str):
+        self.max_buffer = max_buffer
+        self.policy = policy
+        self.closed = False
+        self.evicted = False
+
+        self._buffer = deque()
+        self._ready = asyncio.Event()
+        self._dropped = 0  # since the last "lagged" notice
+
+    def push(self, message: str):
+        if self.closed:
+            return
+        if len(self._buffer) >= self.max_buffer:
+            if self.policy == "disconnect":
+                self.evicted = True
+                EVICTED.inc()
+                self.close()
+                return
+            self._buffer.popleft()
+            self._dropped += 1
+            DROPPED.inc()
+        self._buffer.append(message)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        while True:
+            if self.closed and (self.evicted or not self._buffer):
+                raise StopAsyncIteration
+            if self._dropped:
+                dropped, self._dropped = self._dropped, 0
+                return TranscriptEvent(type="lagged", text=str(dropped)).model_dump_json()
+            if self._buffer:
+                return self._buffer.popleft()
+            self._ready.clear()
+            await self._ready.wait()
+
+
+class MeetingHub:
+    """
+    Fans one meeting's transcript out to every viewer on this worker.
+
+    The events arrive once from the meeting's channel, whichever worker
+    is transcribing, and each one is handed to the viewers as the same
+    string. Recent segments are kept so viewers who join late catch up.
+    """
+    def __init__(self, backend: StateBackend, store: Optional[TranscriptStore], meeting_id: str, snapshot_segments: int):
+        self.backend = backend
+        self.store = store
+        self.meeting_id = meeting_id
+        self.subscribers: Set[Subscriber] = set()
+
+        self._segments = deque(maxlen=snapshot_segments)  # recent finished speaker turns
+        self._open: List[TranscriptEvent] = []   # final words of the segment in progress
+        self._stored_until = float("-inf")       # end of the newest segment loaded from the store
+        self._snapshot: Optional[str] = None     # serialized once per change, shared by joiners
+        self._channel: Optional[Subscription] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Subscribe before reading history so nothing falls in between
+        self._channel = await self.backend.subscribe(meeting_channel(self.meeting_id))
+        self._task = asyncio.create_task(self._pump())
+        await self._load_history()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._channel is not None:
+            await self._channel.close()
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+
+    def add(self, subscriber: Subscriber):
+        subscriber.push(self.snapshot())
+        self.subscribers.add(subscriber)
+
+    def snapshot(self) -> str:
+        if self._snapshot is None:
+            self._snapshot = MeetingSnapshot(
+                meeting_id=self.meeting_id, segments=list(self._segments), events=self._open
+            ).model_dump_json()
+        return self._snapshot
+
+    async def _load_history(self):
+        """
+        Seed the recent segments from the transcript store, for a meeting
+        that was under way before anyone here was watching.
+        """
+        if self.store is None or not self._segments.maxlen:
+            return
+        try:
+            meeting = await self.store.get_meeting(self.meeting_id)
+            if not meeting:
+                return
+            offset = max(0, meeting["segment_count"] - self._segments.maxlen)
+            stored = await self.store.get_segments(self.meeting_id, offset=offset, limit=self._segments.maxlen)
+        except Exception as e:
+            logger.warning("Loading history for meeting %s failed: %s", self.meeting_id, e)
+            return
+        if stored:
+            # Anything that arrived live meanwhile is newer
+            live = list(self._segments)
+            self._segments.clear()
+            self._segments.extend(stored)
+            self._stored_until = stored[-1].end
+            self._segments.extend(segment for segment in live if segment.start >= self._stored_until)
+            self._snapshot = None
+
+    async def _pump(self):
+        async for message in self._channel:
+            try:
+                self._remember(TranscriptEvent.model_validate_json(message))
+            except ValueError as e:
+                logger.warning("Bad event on meeting %s: %s", self.meeting_id, e)
+                continue
+            for subscriber in list(self.subscribers):
+                subscriber.push(message)
+
+    def _remember(self, event: TranscriptEvent):
+        if event.type == "word" and event.is_final:
+            self._open.append(event)
+        elif event.type == "segment_complete":
+            words = [
+                Word(text=word.text, start=word.start, end=word.end, speaker_id=word.speaker_id)
+                for word in self._open
+            ]
+            self._open = []
+            self._segments.extend(
+                segment for segment in TranscriptRecorder.speaker_turns(words)
+                if segment.start >= self._stored_until
+            )
+        else:
+            return  # partials are superseded; nothing to keep
+        self._snapshot = None
+
+
+class BroadcastHub:
+    """
+    Meeting hubs on this worker, started with a meeting's first viewer and
+    stopped with its last.
+    """
+    def __init__(
+        self,
+        backend: StateBackend,
+        store: Optional[TranscriptStore] = None,
+        max_buffer: Optional[int] = None,
+        policy: Optional[str] = None,
+        snapshot_segments: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.store = store
+        self.max_buffer = max_buffer or settings.BROADCAST_SUBSCRIBER_BUFFER
+        self.policy = policy or settings.BROADCAST_SLOW_CONSUMER
+        if self.policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {self.policy}")
+        self.snapshot_segments = snapshot_segments if snapshot_segments is not None else settings.BROADCAST_SNAPSHOT_SEGMENTS
+
+        self.meetings: Dict[str, MeetingHub] = {}
+        self._starting: Dict[str, asyncio.Task] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(hub.subscribers) for hub in self.meetings.values())
+
+    async def subscribe(self, meeting_id: str) -> Subscriber:
+        """
+        Start following a meeting; the first message is its snapshot.
+        """
+        hub = self.meetings.get(meeting_id)
+        if hub is None:
+            # Viewers arriving together share one start
+            starting = self._starting.get(meeting_id)
+            if starting is None:
+                starting = self._starting[meeting_id] = asyncio.create_task(self._start(meeting_id))
+            hub = await asyncio.shield(starting)
+        subscriber = Subscriber(self.max_buffer, self.policy)
+        hub.add(subscriber)
+        return subscriber
+
+    async def _start(self, meeting_id: str) -> MeetingHub:
+        try:
+            hub = MeetingHub(self.backend, self.store, meeting_id, self.snapshot_segments)
+            await hub.start()
+            self.meetings[meeting_id] = hub
+            return hub
+        finally:
+            del self._starting[meeting_id]
+
+    async def unsubscribe(self, meeting_id: str, subscriber: Subscriber):
+        subscriber.close()
+        hub = self.meetings.get(meeting_id)
+        if hub is None:
+            return
+        hub.subscribers.discard(subscriber)
+        if not hub.subscribers:
+            del self.meetings[meeting_id]
+            await hub.close()
+
+    async def close(self):
+        for hub in list(self.meetings.values()):
+            await hub.close()
+        self.meetings.clear()
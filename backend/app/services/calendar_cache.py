@@ -0,0 +1,199 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from app.core.config import settings
+from app.core.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+def _parse_time(value: Dict) -> Optional[datetime.datetime]:
+    """
+    Calendar start/end as an aware datetime; all-day dates count from midnight UTC.
+    """
+    if not value:
+        return None
+    if 'dateTime' in value:
+        return datetime.datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+    if 'date' in value:
+        return datetime.datetime.fromisoformat(value['date']).replace(tzinfo=datetime.timezone.utc)
+    return None
+
+
+class UpcomingMeetingsCache:
+    """
+    Upcoming calendar events and their Meet links, kept current with
+    Calendar incremental sync (syncToken) and persisted to disk.
+
+    Reads are served from memory. Once the data is older than the TTL a
+    single background sync fetches only what changed; callers keep getting
+    the cached copy meanwhile; after a failed sync the next one waits,
+    backing off exponentially. Events that have ended are evicted.
+    """
+    def __init__(self, google_service, path: Optional[str] = None, ttl: Optional[float] = None):
+        self.google_service = google_service
+        self.path = path or settings.CALENDAR_CACHE_PATH
+        self.ttl = ttl if ttl is not None else settings.CALENDAR_CACHE_TTL
+
+        self._events: Dict[str, Dict] = {}
+        self._sync_token: Optional[str] = None
+        self._synced_at: Optional[float] = None  # monotonic time of the last sync
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_failures = 0
+        self._retry_at = 0.0  # monotonic time before which no background sync starts
+
+        # Rendered responses: limit -> (version, valid until, body, etag)
+        self._rendered: Dict[int, Tuple[int, datetime.datetime, bytes, str]] = {}
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._events = data.get('events', {})
+            self._sync_token = data.get('sync_token')
+        except Exception as e:
+            logger.warning("Calendar cache load failed: %s", e)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'sync_token': self._sync_token, 'events': self._events}, f)
+        os.replace(tmp_path, self.path)
+
+    async def get_upcoming(self, limit: int = 20) -> Tuple[bytes, str]:
+        """
+        Return the JSON body and ETag for the next `limit` meetings.
+        """
+        if self._synced_at is None:
+            # Nothing fetched in this process yet (disk data may be stale)
+            await self.refresh()
+        elif time.monotonic() - self._synced_at > self.ttl and time.monotonic() >= self._retry_at:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh())
+                self._refresh_task.add_done_callback(self._refresh_done)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cached = self._rendered.get(limit)
+        if cached and cached[0] == self._version and now < cached[1]:
+            return cached[2], cached[3]
+
+        upcoming = sorted(
+            (event for event in self._events.values() if _parse_time(event['end']) > now),
+            key=lambda event: _parse_time(event['start']),
+        )[:limit]
+
+        # The list only changes when data changes or the first listed meeting ends
+        valid_until = min((_parse_time(event['end']) for event in upcoming), default=now + datetime.timedelta(days=1))
+        body = json.dumps(upcoming).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._rendered[limit] = (self._version, valid_until, body, etag)
+        return body, etag
+
+    async def refresh(self):
+        """
+        Sync with Calendar; concurrent callers share a single sync.
+        """
+        synced_at = self._synced_at
+        async with self._lock:
+            if self._synced_at != synced_at:
+                return
+            service = await self.google_service.get_service()
+            changed = await asyncio.to_thread(self._sync, service)
+            self._synced_at = time.monotonic()
+            if changed:
+                self._version += 1
+
+    def _refresh_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self._refresh_failures = 0
+            return
+        self._refresh_failures += 1
+        delay = min(
+            settings.CALENDAR_REFRESH_BACKOFF * 2 ** (self._refresh_failures - 1),
+            settings.CALENDAR_REFRESH_MAX_BACKOFF,
+        )
+        self._retry_at = time.monotonic() + delay
+        logger.error("Calendar sync failed, next attempt in %.0fs", delay, exc_info=error)
+        ERRORS.inc(stage="calendar")
+
+    def _sync(self, service) -> bool:
+        """
+        Pull changes since the last sync token, or everything if there is
+        none or Calendar has expired it. Returns True if anything changed.
+        """
+        full = self._sync_token is None
+        try:
+            items, sync_token = self._list_events(service, self._sync_token)
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            # Sync token expired: start over with a full sync
+            full = True
+            items, sync_token = self._list_events(service, None)
+
+        events = {} if full else dict(self._events)
+        for item in items:
+            if item.get('status') == 'cancelled':
+                events.pop(item['id'], None)
+            elif _parse_time(item.get('start')) and _parse_time(item.get('end')):
+                events[item['id']] = self._slim(item)
+
+        # Evict meetings that have already ended
+        now = datetime.datetime.now(datetime.timezone.utc)
+        events = {event_id: event for event_id, event in events.items() if _parse_time(event['end']) > now}
+
+        changed = events != self._events
+        self._events = events
+        self._sync_token = sync_token
+        if changed or full:
+            self._save()
+        return changed
+
+    def _list_events(self, service, sync_token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        http = self.google_service.new_http()
+        items = []
+        page_token = None
+        while True:
+            kwargs = {'calendarId': 'primary', 'singleEvents': True, 'maxResults': 2500}
+            if sync_token:
+                kwargs['syncToken'] = sync_token
+            if page_token:
+                kwargs['pageToken'] = page_token
+            result = service.events().list(**kwargs).execute(http=http)
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+
+    @staticmethod
+    def _slim(event: Dict) -> Dict:
+        entry_points = event.get('conferenceData', {}).get('entryPoints', [])
+        meet_url = next((entry.get('uri') for entry in entry_points if entry.get('entryPointType') == 'video'), None)
+        return {
+            'id': event['id'],
+            'summary': event.get('summary', 'No Title'),
+            'start': event['start'],
+            'end': event['end'],
+            'meet_url': meet_url or event.get('hangoutLink'),
+            'event_link': event.get('htmlLink'),
+        }
+
+    def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
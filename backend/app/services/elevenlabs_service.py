@@ -1,14 +1,61 @@
 import asyncio
 import io
-from typing import AsyncGenerator
-from elevenlabs import ElevenLabs
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncGenerator, List, Optional
 from app.core.config import settings
-from app.models.transcript import TranscriptEvent
+from app.core.metrics import ERRORS, STT_REQUESTS, StageTimings
+from app.models.transcript import TranscriptEvent, Word
+from app.services.audio_segmenter import AudioSegment, FixedSegmenter, VadSegmenter
+from app.services.speaker_tracker import SpeakerTracker, voice_features
+from app.services.stt_cache import STTResultCache, cache_key
+from app.services.stt_pool import STTClientPool
+from app.services.transcript_stitcher import TranscriptStitcher
+
+logger = logging.getLogger(__name__)
+
+class _SegmentFile(io.RawIOBase):
+    """
+    Read-only file over a segment's memoryview, so uploads stream from
+    the ring buffer instead of a BytesIO copy.
+    """
+    def __init__(self, audio, name: str):
+        self._audio = memoryview(audio).cast("B")
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._audio) - self._pos)
+        buffer[:size] = self._audio[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._audio)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
 
 class ElevenLabsService:
-    def __init__(self):
-        self.api_key = settings.ELEVENLABS_API_KEY
-        self.client = ElevenLabs(api_key=self.api_key)
+    def __init__(self, pool: Optional[STTClientPool] = None, cache: Optional[STTResultCache] = None):
+        # Sessions share the app-wide pool; standalone use gets its own
+        self.pool = pool or STTClientPool()
+        self.cache = cache
+        self.session_id = uuid.uuid4().hex
 
         #Buffer configuration
         self.buffer_duration = 5.0
@@ -20,106 +67,329 @@ class ElevenLabsService:
         self.buffer_size=int(self.buffer_duration*self.bytes_per_second)
         self.overlap_size=int(self.overlap_duration*self.bytes_per_second)
 
+        #Voice activity detection
+        self.vad_enabled = settings.VAD_ENABLED
+
+        #Session-wide speaker ids across segments
+        self.speaker_tracking = settings.SPEAKER_TRACKING
+
+        #Pipelining configuration
+        self.max_in_flight = max(1, settings.STT_MAX_IN_FLIGHT)
+
+        #Latency tier: "low" also sends interim hypotheses for the open segment
+        self.latency_mode = settings.STT_LATENCY_MODE
+        self.interim_interval = settings.STT_INTERIM_INTERVAL
+        self.max_interim_per_segment = settings.STT_MAX_INTERIM_PER_SEGMENT
+        self.interim_calls = 0
+
+        #Backlog gauge for this session
+        self.in_flight = 0
+        self.backlog_seconds = 0.0
+
+        #Per-stage latency of this session
+        self.timings = StageTimings()
+
     async def transcribe_stream(self, audio_stream: AsyncGenerator[bytes, None]):
         """
-        Buffer audio chunks and send to ElevenLabs API with diarization.
+        Cut audio chunks into segments and send to ElevenLabs API with diarization.
+        Segments are dispatched as soon as they are cut, with up to max_in_flight
+        requests outstanding; results are emitted in dispatch order.
         Stream results word-by-word back to the client.
+
+        In the "low" latency mode the still-open segment is also sent every
+        interim_interval seconds of audio, and the hypothesis is emitted as a
+        "partial" event (is_final=False) that later finals replace.
         """
 
-        #Buffer audio chunks
-        audio_buffer = bytearray()
-        overlap_buffer = bytearray()
-        last_end_time=0.0
+        segmenter = self._create_segmenter()
+        stitcher = TranscriptStitcher(self.overlap_duration)
+        tracker = SpeakerTracker() if self.speaker_tracking else None
+
+        # Dispatched segments, oldest first: (task, segment)
+        pending = deque()
+
+        # When received audio arrived, as (samples received so far, time),
+        # to time how long each segment's audio sat in the buffer
+        arrivals = deque()
+        received_samples = 0
+        chunks = audio_stream.__aiter__()
+        next_chunk = None
+        stream_done = False
+
+        # At most one interim request at a time: (task, segment)
+        interim = None
+        interim_start = None   # open segment the interim calls are counted for
+        interim_count = 0
 
         try:
-            async for chunk in audio_stream:
-                #Add chunk to buffer
-                audio_buffer.extend(chunk)
-
-                #Check if buffer is full(5 seconds worth of audio)
-                if len(audio_buffer)>=self.buffer_size:
-                    #process this buffer
-                    async for event in self._process_buffer(bytes(audio_buffer),last_end_time):
+            while not stream_done or pending:
+                # Emit finished segments in order. Block on the oldest one
+                # when the pipeline is full or there is no more audio.
+                while pending and (pending[0][0].done() or stream_done or len(pending) >= self.max_in_flight):
+                    task, segment = pending.popleft()
+                    async for event in self._emit_segment(task, segment, stitcher, tracker):
                         yield event
+                    self._update_backlog(pending)
+
+                # Interim results only count while their segment is still open
+                if interim is not None and interim[0].done():
+                    task, segment = interim
+                    interim = None
+                    if segment.start_sample == segmenter.open_start:
+                        event = self._interim_event(task, segment, stitcher)
+                        if event is not None:
+                            yield event
+
+                if stream_done:
+                    continue
+
+                # Wait for either new audio or the oldest result
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(anext(chunks))
+                waiters = {next_chunk}
+                if pending:
+                    waiters.add(pending[0][0])
+                if interim is not None:
+                    waiters.add(interim[0])
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+
+                if not next_chunk.done():
+                    continue
+
+                received, next_chunk = next_chunk, None
+                try:
+                    chunk = received.result()
+                except StopAsyncIteration:
+                    stream_done = True
+                    # Process remaining audio in buffer
+                    segment = segmenter.flush()
+                    if segment is not None:
+                        self._observe_fill(segment, arrivals)
+                        pending.append(self._dispatch(segment, tracker is not None))
+                        self._update_backlog(pending)
+                    continue
+
+                received_samples += len(chunk) // 2
+                arrivals.append((received_samples, time.perf_counter()))
+
+                #Send every finished segment without waiting for earlier ones
+                for segment in segmenter.feed(chunk):
+                    self._observe_fill(segment, arrivals)
+                    pending.append(self._dispatch(segment, tracker is not None))
+                    self._update_backlog(pending)
+
+                # Send the growing open segment for an interim hypothesis,
+                # unless the session is already behind on finals
+                if self.latency_mode == "low" and interim is None and len(pending) < self.max_in_flight:
+                    open_start = segmenter.open_start
+                    if open_start != interim_start:
+                        interim_start, interim_count = open_start, 0
+                    if (
+                        open_start is not None
+                        and interim_count < self.max_interim_per_segment
+                        and segmenter.open_duration >= self.interim_interval * (interim_count + 1)
+                    ):
+                        interim = self._dispatch(segmenter.lease_open())
+                        interim_count += 1
+                        self.interim_calls += 1
 
-                        # Update last_end_time from the last word
-                        if event.type=="word" and hasattr(event,'end'):
-                            last_end_time=event.end
-
-                    # Keep overlap for next buffer (last 0.5 seconds)
-                    overlap_buffer = audio_buffer[-self.overlap_size:]
-                        
-                    # Reset buffer with overlap
-                    audio_buffer = bytearray(overlap_buffer)    
-
-            # Process remaining audio in buffer
-            if len(audio_buffer) > self.overlap_size:
-                async for event in self._process_buffer(
-                    bytes(audio_buffer), 
-                    last_end_time
-                ):
-                    yield event
-                    
         except Exception as e:
-            print(f"ElevenLabs Service Error: {e}")
+            logger.exception("ElevenLabs Service Error")
+            ERRORS.inc(stage="stream")
             yield TranscriptEvent(type="error", text=str(e), is_final=False)
-                    
-    async def _process_buffer(self, audio_bytes: bytes, time_offset: float) -> AsyncGenerator[TranscriptEvent, None]:
+        finally:
+            if next_chunk is not None:
+                next_chunk.cancel()
+            for task, _ in pending:
+                task.cancel()
+            if interim is not None:
+                interim[0].cancel()
+            pending.clear()
+            self._update_backlog(pending)
+
+    def _create_segmenter(self):
+        """
+        Build the per-stream segmenter: pause-based VAD or fixed windows.
+        """
+        if not self.vad_enabled:
+            return FixedSegmenter(self.sample_rate, self.buffer_duration, self.overlap_duration, self.max_in_flight)
+        return VadSegmenter(
+            sample_rate=self.sample_rate,
+            energy_threshold=settings.VAD_ENERGY_THRESHOLD,
+            zcr_threshold=settings.VAD_ZCR_THRESHOLD,
+            min_segment=settings.VAD_MIN_SEGMENT,
+            max_segment=settings.VAD_MAX_SEGMENT,
+            min_pause=settings.VAD_MIN_PAUSE,
+            overlap_duration=self.overlap_duration,
+            max_in_flight=self.max_in_flight,
+        )
+
+    def _observe_fill(self, segment: AudioSegment, arrivals: deque):
+        """
+        Record how long the segment's first audio waited to be cut.
         """
-        Send audio buffer to ElevenLabs API and stream words back.
+        # Later segments never start before this one, so older audio can go
+        while arrivals and arrivals[0][0] <= segment.start_sample:
+            arrivals.popleft()
+        if arrivals:
+            self.timings.observe("buffer_fill", time.perf_counter() - arrivals[0][1])
+
+    def _dispatch(self, segment: AudioSegment, with_features: bool = False):
+        """
+        Start the API request for a segment in the background, along with
+        its voice features if requested. The task returns (response, features).
+        The segment's audio stays leased until both finish.
+        """
+        task = asyncio.create_task(self.transcribe_segment(segment.audio, with_features))
+        task.add_done_callback(lambda _: segment.release())
+        return task, segment
+
+    async def transcribe_segment(self, audio, with_features: bool):
+        """
+        Transcribe one segment of 16 kHz PCM, returning (response, features);
+        features are its voice_features if requested, else None.
+        """
+        if not with_features:
+            return await self._transcribe(audio), None
+        # Features are computed on a worker thread while the request is out
+        return await asyncio.gather(
+            self._transcribe(audio),
+            asyncio.to_thread(voice_features, audio, self.sample_rate),
+        )
+
+    def _update_backlog(self, pending):
+        """
+        Refresh the per-session backlog gauge from the pending segments.
+        """
+        self.in_flight = len(pending)
+        self.backlog_seconds = sum(len(segment.audio) for _, segment in pending) / self.bytes_per_second
+
+    async def _transcribe(self, audio) -> object:
+        """
+        Send audio buffer to ElevenLabs API and return the raw response.
+        """
+        params = dict(
+            model_id="scribe_v1",  # Use scribe_v1 for diarization support
+            file_format="pcm_s16le_16",  # 16-bit PCM, 16kHz
+            diarize=True,
+            num_speakers=None,  # Auto-detect
+            timestamps_granularity="word"  # word-level timestamps
+        )
+
+        # Call ElevenLabs API with diarization
+        # Runs on the shared pool, queued fairly behind other sessions
+        async def convert():
+            # Create a file-like object over the audio without copying it
+            audio_file = _SegmentFile(audio, "audio.pcm")
+            started = time.perf_counter()
+            try:
+                response = await self.pool.convert(self.session_id, file=audio_file, **params)
+            except Exception:
+                STT_REQUESTS.inc(outcome="error")
+                raise
+            STT_REQUESTS.inc(outcome="ok")
+            self.timings.observe("stt_request", time.perf_counter() - started)
+            return response
+
+        # Audio already transcribed with the same parameters is served from the cache
+        if self.cache is None:
+            return await convert()
+        return await self.cache.get_or_fetch(cache_key(audio, **params), convert)
+
+    def parse_words(self, response, time_offset: float) -> List[Word]:
+        """
+        Convert the API's word list to Words on the session timeline.
+        """
+        words = []
+        for word_data in getattr(response, 'words', None) or []:
+            # Spacing entries carry no timing information worth keeping
+            if getattr(word_data, 'type', 'word') == 'spacing':
+                continue
+
+            # Extract word information
+            word_text = word_data.text if hasattr(word_data, 'text') else str(word_data)
+            word_start = (word_data.start if hasattr(word_data, 'start') and word_data.start is not None else 0.0) + time_offset
+            word_end = (word_data.end if hasattr(word_data, 'end') and word_data.end is not None else 0.0) + time_offset
+            speaker = getattr(word_data, 'speaker_id', None)
+
+            words.append(Word(text=word_text, start=word_start, end=word_end, speaker_id=speaker))
+        return words
+
+    def _interim_event(self, task: asyncio.Task, segment: AudioSegment, stitcher: TranscriptStitcher) -> Optional[TranscriptEvent]:
+        """
+        Turn a finished interim request into a single "partial" event.
+        """
+        if task.cancelled() or task.exception() is not None:
+            # A failed interim is not worth surfacing; the final will follow
+            return None
+
+        response, _ = task.result()
+        words = self.parse_words(response, segment.start_sample / self.sample_rate)
+        words = stitcher.stitch(words, commit=False)
+        text = " ".join(word.text.strip() for word in words if word.text.strip())
+        if not text:
+            return None
+        return TranscriptEvent(
+            type="partial",
+            text=text,
+            speaker_id=words[0].speaker_id,
+            is_final=False,
+            start=words[0].start,
+            end=words[-1].end
+        )
+
+    async def _emit_segment(
+        self,
+        task: asyncio.Task,
+        segment: AudioSegment,
+        stitcher: TranscriptStitcher,
+        tracker: Optional[SpeakerTracker] = None,
+    ) -> AsyncGenerator[TranscriptEvent, None]:
+        """
+        Wait for a dispatched segment and stream its new words back.
         """
         try:
-            # Create a file-like object from bytes
-            audio_file = io.BytesIO(audio_bytes)
-            audio_file.name = "audio.pcm"
-            
-            # Call ElevenLabs API with diarization
-            # Run in thread pool since it's a blocking call
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.speech_to_text.convert(
-                    model_id="scribe_v1",  # Use scribe_v1 for diarization support
-                    file=audio_file,
-                    file_format="pcm_s16le_16",  # 16-bit PCM, 16kHz
-                    diarize=True,
-                    num_speakers=None,  # Auto-detect
-                    timestamps_granularity="word"  # word-level timestamps
+            response, features = await task
+            started = time.perf_counter()
+
+            # Word times from the API are relative to the segment start
+            offset = segment.start_sample / self.sample_rate
+            words = self.parse_words(response, offset)
+
+            # Segment-local speaker labels become session-wide ids; this
+            # needs the overlap words, so it runs before stitching
+            if tracker is not None:
+                words = tracker.assign(words, features, offset)
+            new_words = stitcher.stitch(words)
+            self.timings.observe("parse", time.perf_counter() - started)
+
+            for word in new_words:
+                # Create word event
+                yield TranscriptEvent(
+                    type="word",
+                    text=word.text,
+                    speaker_id=word.speaker_id,
+                    is_final=True,
+                    start=word.start,
+                    end=word.end
                 )
-            )
-            
-            # Parse response and stream words
-            if hasattr(response, 'words') and response.words:
-                for word_data in response.words:
-                    # Extract word information
-                    word_text = word_data.text if hasattr(word_data, 'text') else str(word_data)
-                    word_start = (word_data.start if hasattr(word_data, 'start') and word_data.start is not None else 0.0) + time_offset
-                    word_end = (word_data.end if hasattr(word_data, 'end') and word_data.end is not None else 0.0) + time_offset
-                    speaker = word_data.speaker if hasattr(word_data, 'speaker') else None
-                    
-                    # Create word event
-                    yield TranscriptEvent(
-                        type="word",
-                        text=word_text,
-                        speaker_id=speaker,
-                        is_final=True,
-                        start=word_start,
-                        end=word_end
-                    )
-                    
-                    # Small delay to simulate streaming (optional)
-                    await asyncio.sleep(0.01)
-            
-            # Also send full transcript for the segment
-            if hasattr(response, 'text') and response.text:
+
+            # Also send full transcript for the segment, minus repeated overlap
+            if words:
+                text = " ".join(word.text.strip() for word in new_words if word.text.strip())
+            else:
+                text = getattr(response, 'text', None)
+            if text:
                 yield TranscriptEvent(
                     type="segment_complete",
-                    text=response.text,
+                    text=text,
                     speaker_id=None,
-                    is_final=True
+                    is_final=True,
+                    start=new_words[0].start if new_words else None,
+                    end=new_words[-1].end if new_words else None
                 )
-                
+
         except Exception as e:
-            print(f"Buffer processing error: {e}")
+            logger.warning("Buffer processing error: %s", e)
+            ERRORS.inc(stage="segment")
             yield TranscriptEvent(type="error", text=f"Processing error: {str(e)}", is_final=False)
-        
\ No newline at end of file
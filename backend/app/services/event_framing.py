@@ -0,0 +1,57 @@
+import asyncio
+from typing import AsyncGenerator, AsyncIterable, List, Optional
+
+from app.models.transcript import TranscriptEvent
+
+FRAMINGS = ("word", "segment", "batch")
+
+async def batch_events(
+    events: AsyncIterable[TranscriptEvent],
+    max_words: Optional[int] = None,
+    max_delay: Optional[float] = None,
+) -> AsyncGenerator[List[TranscriptEvent], None]:
+    """
+    Group a transcript event stream into batches for sending.
+
+    A batch is closed by any non-word event (segment end, partial, error),
+    after max_words word events, or max_delay seconds after its first event.
+    With neither limit set this frames one batch per segment.
+    """
+    loop = asyncio.get_running_loop()
+    stream = events.__aiter__()
+    next_event = None
+    batch: List[TranscriptEvent] = []
+    deadline = None
+
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(anext(stream))
+
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({next_event}, timeout=timeout)
+            if not done:
+                # Waited long enough for the rest of the batch
+                yield batch
+                batch, deadline = [], None
+                continue
+
+            received, next_event = next_event, None
+            try:
+                event = received.result()
+            except StopAsyncIteration:
+                break
+
+            batch.append(event)
+            if deadline is None and max_delay is not None:
+                deadline = loop.time() + max_delay
+
+            if event.type != "word" or (max_words and len(batch) >= max_words):
+                yield batch
+                batch, deadline = [], None
+
+        if batch:
+            yield batch
+    finally:
+        if next_event is not None:
+            next_event.cancel()
@@ -1,54 +1,134 @@
 
 from typing import List, Dict, Optional
 import asyncio
-from app.models.transcript import TranscriptEvent, Word
 
 import os.path
 import datetime
+import hashlib
+import logging
+import uuid
+import httplib2
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Calendar API limit on requests per batch
+BATCH_SIZE = 50
+
+# Refresh the access token this long before it expires
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
 class GoogleService:
     def __init__(self):
         self.creds = None
         self.service = None
+        self.token_path = 'token.json'
+
+        # Single-flight guard so concurrent requests share one auth/refresh
+        self._auth_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_service(self):
+        """
+        Return the cached Calendar service, authenticating off the event loop
+        on a cold start. A background task refreshes the token before expiry.
+        """
+        if self.service is not None and self.creds and self.creds.valid:
+            return self.service
+
+        async with self._auth_lock:
+            # Another request may have finished authenticating while we waited
+            if self.service is None or not (self.creds and self.creds.valid):
+                await asyncio.to_thread(self._authenticate)
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self.service
+
+    async def _refresh_loop(self):
+        """
+        Proactively refresh the access token shortly before it expires.
+        """
+        while self.creds and getattr(self.creds, 'refresh_token', None) and self.creds.expiry:
+            # google-auth keeps expiry as naive UTC
+            now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            delay = (self.creds.expiry - REFRESH_MARGIN - now).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                async with self._auth_lock:
+                    await asyncio.to_thread(self._refresh_credentials)
+            except Exception as e:
+                logger.warning("Google token refresh failed: %s", e)
+                await asyncio.sleep(60)
+
+    def _refresh_credentials(self):
+        self.creds.refresh(Request())
+        self._save_token()
+
+    def _save_token(self):
+        with open(self.token_path, 'w') as token:
+            token.write(self.creds.to_json())
+
+    def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
 
     def _authenticate(self):
         """Authentication flow for Google Calendar API"""
-        print(f"DEBUG: Starting authentication. Current CWD: {os.getcwd()}")
+        logger.debug("Starting authentication. Current CWD: %s", os.getcwd())
         if self.creds and self.creds.valid:
-            print("DEBUG: Using existing in-memory credentials")
+            logger.debug("Using existing in-memory credentials")
+            return
+
+        if settings.GOOGLE_CALENDAR_API_ENDPOINT:
+            # Local fake Calendar server: no OAuth
+            self.creds = AnonymousCredentials()
+            self.service = build(
+                'calendar', 'v3',
+                credentials=self.creds,
+                client_options={'api_endpoint': settings.GOOGLE_CALENDAR_API_ENDPOINT.rstrip('/') + '/calendar/v3/'},
+                static_discovery=True,
+            )
             return
 
         token_path = 'token.json'
         # Check current dir
         if os.path.exists(token_path):
-             print(f"DEBUG: Found token.json in {os.getcwd()}")
+             logger.debug("Found token.json in %s", os.getcwd())
         # Check parent dir
         elif os.path.exists(os.path.join('..', 'token.json')):
-             print(f"DEBUG: Found token.json in parent directory")
+             logger.debug("Found token.json in parent directory")
              token_path = os.path.join('..', 'token.json')
         else:
-             print("DEBUG: token.json NOT found in CWD or parent")
+             logger.debug("token.json NOT found in CWD or parent")
 
+        self.token_path = token_path
         if os.path.exists(token_path):
             try:
                 self.creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-                print("DEBUG: Loaded credentials from file")
+                logger.debug("Loaded credentials from file")
             except Exception as e:
-                print(f"DEBUG: Error loading credentials: {e}")
+                logger.warning("Error loading credentials: %s", e)
         
         if not self.creds or not self.creds.valid:
-            print("DEBUG: Credentials invalid or missing, attempting refresh/login")
+            logger.debug("Credentials invalid or missing, attempting refresh/login")
             if self.creds and self.creds.expired and self.creds.refresh_token:
-                print("DEBUG: Refreshing token")
+                logger.debug("Refreshing token")
                 self.creds.refresh(Request())
             else:
-                print("DEBUG: Need new login")
+                logger.debug("Need new login")
                 if not os.path.exists('backend/credentials.json') and os.path.exists('credentials.json'):
                      # Fallback if in root
                      flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
@@ -66,21 +146,20 @@ class GoogleService:
                 self.creds = flow.run_local_server(port=0)
             
             # Save the credentials for the next run
-            print(f"DEBUG: Saving token to {token_path}")
-            with open(token_path, 'w') as token:
-                token.write(self.creds.to_json())
+            logger.debug("Saving token to %s", token_path)
+            self._save_token()
 
-        self.service = build('calendar', 'v3', credentials=self.creds)
-        print("DEBUG: Service built successfully")
+        # Build once; token refreshes update the credentials in place.
+        # The bundled discovery document avoids a network fetch.
+        self.service = build('calendar', 'v3', credentials=self.creds, static_discovery=True)
+        logger.debug("Service built successfully")
 
-    async def create_meeting(self, summary: str, start_time: Optional[datetime.datetime] = None, end_time: Optional[datetime.datetime] = None) -> Dict:
+    def _event_body(self, summary: str, start_time: Optional[datetime.datetime], end_time: Optional[datetime.datetime], idempotency_key: Optional[str] = None) -> Dict:
         """
-        Create a Google Meet event.
-        If start_time is None, creates an instant meeting (starts now).
+        Build the Calendar event for a meeting.
+        With an idempotency key the event id is derived from it, so
+        retrying the same request cannot create a second event.
         """
-        # Run auth efficiently (sync call but fast if token exists)
-        self._authenticate()
-        
         # Get local system timezone
         local_tz = datetime.datetime.now().astimezone().tzinfo
         
@@ -109,22 +188,20 @@ class GoogleService:
             },
             'conferenceData': {
                 'createRequest': {
-                    'requestId': f"screen5-{int(datetime.datetime.now().timestamp())}",
+                    'requestId': f"screen5-{uuid.uuid4().hex}",
                     'conferenceSolutionKey': {'type': 'hangoutsMeet'}
                 }
             }
         }
 
-        # We must run this in a thread executor because the google client is synchronous
-        def _execute_insert():
-            return self.service.events().insert(
-                calendarId='primary', 
-                body=event, 
-                conferenceDataVersion=1
-            ).execute()
-
-        event_result = await asyncio.to_thread(_execute_insert)
+        if idempotency_key:
+            # Hex digits are valid Calendar event id characters
+            event['id'] = hashlib.sha256(idempotency_key.encode()).hexdigest()
+            event['conferenceData']['createRequest']['requestId'] = f"screen5-{event['id'][:32]}"
+        return event
 
+    @staticmethod
+    def _meeting_result(event_result: Dict) -> Dict:
         meet_link = event_result.get('conferenceData', {}).get('entryPoints', [{}])[0].get('uri')
         
         return {
@@ -133,55 +210,123 @@ class GoogleService:
             "id": event_result.get('id')
         }
 
-    async def get_transcript(self, meeting_id: str) -> Dict:
+    def new_http(self):
         """
-        Mock retrieval of a transcript from Google Meet/Drive.
-        In reality, this would search Drive for the transcript file associated with the meeting ID.
+        Fresh authorized transport per call; httplib2 is not thread-safe.
         """
-        # Simulate network delay
-        await asyncio.sleep(1.0)
-
-        # Mock Data
-        mock_transcript = {
-            "meeting_id": meeting_id,
-            "title": "Weekly Sync",
-            "date": "2024-05-21",
-            "events": [
-                {
-                    "type": "segment_complete",
-                    "text": "Hello everyone, thanks for joining.",
-                    "speaker_id": "Speaker A",
-                    "start": 0.0,
-                    "end": 2.5,
-                    "is_final": True
-                },
-                {
-                    "type": "segment_complete",
-                    "text": "Today we are discussing the Q3 roadmap.",
-                    "speaker_id": "Speaker A",
-                    "start": 3.0,
-                    "end": 5.5,
-                    "is_final": True
-                },
-                {
-                    "type": "segment_complete",
-                    "text": "I have some updates on the backend migration.",
-                    "speaker_id": "Speaker B",
-                    "start": 6.0,
-                    "end": 9.0,
-                    "is_final": True
-                }
-            ]
-        }
-        
-        return mock_transcript
+        return AuthorizedHttp(self.creds, http=httplib2.Http(timeout=settings.GOOGLE_HTTP_TIMEOUT))
+
+    async def create_meeting(self, summary: str, start_time: Optional[datetime.datetime] = None, end_time: Optional[datetime.datetime] = None, idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Create a Google Meet event.
+        If start_time is None, creates an instant meeting (starts now).
+        """
+        # Cached after the first call; cold auth runs on a worker thread
+        service = await self.get_service()
+        event = self._event_body(summary, start_time, end_time, idempotency_key)
 
-    async def list_recordings(self) -> List[Dict]:
+        # We must run this in a thread executor because the google client is synchronous
+        def _execute_insert():
+            try:
+                return service.events().insert(
+                    calendarId='primary', 
+                    body=event, 
+                    conferenceDataVersion=1
+                ).execute(http=self.new_http())
+            except HttpError as e:
+                if e.resp.status != 409 or 'id' not in event:
+                    raise
+                # Already created under this idempotency key
+                return service.events().get(calendarId='primary', eventId=event['id']).execute(http=self.new_http())
+
+        event_result = await asyncio.to_thread(_execute_insert)
+        return self._meeting_result(event_result)
+
+    async def create_meetings(self, meetings: List[Dict]) -> List[Dict]:
         """
-        Mock listing of available meeting recordings/transcripts.
+        Create many Google Meet events using batch HTTP requests.
+
+        Each item takes the create_meeting arguments. Items are sent in
+        batches of up to BATCH_SIZE, with at most GOOGLE_BATCH_CONCURRENCY
+        batches in flight. Returns one result per item, in order, with
+        status "created", "exists" (same idempotency key seen before) or
+        "error".
         """
-        await asyncio.sleep(0.5)
-        return [
-            {"id": "meet-abc-123", "title": "Weekly Sync", "date": "2024-05-21"},
-            {"id": "meet-xyz-789", "title": "Design Review", "date": "2024-05-20"}
+        service = await self.get_service()
+        events = [
+            self._event_body(
+                meeting.get('summary', 'New Meeting'),
+                meeting.get('start_time'),
+                meeting.get('end_time'),
+                meeting.get('idempotency_key'),
+            )
+            for meeting in meetings
         ]
+        results: List[Optional[Dict]] = [None] * len(events)
+        limit = asyncio.Semaphore(settings.GOOGLE_BATCH_CONCURRENCY)
+
+        async def _run(indexes: List[int]):
+            async with limit:
+                try:
+                    await asyncio.to_thread(self._execute_batch, service, indexes, events, results)
+                except Exception as e:
+                    # A failed batch fails its own items, not the whole request
+                    logger.warning("Calendar batch of %d events failed: %s", len(indexes), e)
+                    for index in indexes:
+                        if results[index] is None:
+                            results[index] = {"status": "error", "error": str(e)}
+
+        await asyncio.gather(*[
+            _run(list(range(start, min(start + BATCH_SIZE, len(events)))))
+            for start in range(0, len(events), BATCH_SIZE)
+        ])
+        return results
+
+    def _execute_batch(self, service, indexes: List[int], events: List[Dict], results: List[Optional[Dict]]):
+        """
+        Insert one batch of events and fill in their results.
+        Inserts rejected as duplicates are looked up with a follow-up batch.
+        """
+        existing = []
+
+        def _inserted(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = {"status": "created", **self._meeting_result(response)}
+            elif isinstance(exception, HttpError) and exception.resp.status == 409 and 'id' in events[index]:
+                existing.append(index)
+            else:
+                results[index] = {"status": "error", "error": str(exception)}
+
+        batch = self._new_batch(service, _inserted)
+        for index in indexes:
+            batch.add(
+                service.events().insert(calendarId='primary', body=events[index], conferenceDataVersion=1),
+                request_id=str(index),
+            )
+        batch.execute(http=self.new_http())
+
+        if not existing:
+            return
+
+        def _fetched(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = {"status": "exists", **self._meeting_result(response)}
+            else:
+                results[index] = {"status": "error", "error": str(exception)}
+
+        batch = self._new_batch(service, _fetched)
+        for index in existing:
+            batch.add(
+                service.events().get(calendarId='primary', eventId=events[index]['id']),
+                request_id=str(index),
+            )
+        batch.execute(http=self.new_http())
+
+    def _new_batch(self, service, callback):
+        # The discovery batch URI ignores api_endpoint, so point it at the override too
+        if settings.GOOGLE_CALENDAR_API_ENDPOINT:
+            batch_uri = settings.GOOGLE_CALENDAR_API_ENDPOINT.rstrip('/') + '/batch/calendar/v3'
+            return BatchHttpRequest(callback=callback, batch_uri=batch_uri)
+        return service.new_batch_http_request(callback=callback)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterable, Callable, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import ERRORS
+from app.models.transcript import SessionEvent
+from app.services.audio_queue import AudioQueue
+from app.services.elevenlabs_service import ElevenLabsService
+
+logger = logging.getLogger(__name__)
+
+class LiveSession:
+    """
+    Server-side state of one live transcription stream, kept apart from
+    the WebSocket that feeds it so a dropped connection can resume.
+
+    Every message sent has a sequence number and recent ones are kept for
+    replay. When the socket drops, transcription carries on with the audio
+    already received and the session waits resume_grace seconds for the
+    client to come back before ending the stream.
+    """
+    def __init__(
+        self,
+        service: ElevenLabsService,
+        audio_queue: AudioQueue,
+        on_close: Optional[Callable[["LiveSession"], None]] = None,
+        resume_grace: Optional[float] = None,
+        replay_size: Optional[int] = None,
+    ):
+        self.service = service
+        self.audio_queue = audio_queue
+        self.session_id = service.session_id
+        self.resume_grace = resume_grace if resume_grace is not None else settings.SESSION_RESUME_GRACE
+        self.audio_offset = 0  # bytes of audio received over all connections
+        self.websocket = None
+        self.task: Optional[asyncio.Task] = None
+
+        self._on_close = on_close
+        self._replay = deque(maxlen=replay_size or settings.SESSION_REPLAY_EVENTS)  # (seq, message)
+        self._next_seq = 0
+        self._sent_seq = -1  # newest seq sent on the current connection
+        self._send_lock = asyncio.Lock()
+        self._expiry: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    def start(self, messages: AsyncIterable[BaseModel]):
+        """
+        Publish every message of the transcription pipeline until it ends.
+        """
+        self.task = asyncio.create_task(self._run(messages))
+
+    async def _run(self, messages: AsyncIterable[BaseModel]):
+        try:
+            async for message in messages:
+                await self.publish(message)
+        except Exception:
+            logger.exception("Processing error")
+            ERRORS.inc(stage="session")
+        finally:
+            self._cancel_expiry()
+            # Nothing reads the audio any more: release a blocked producer
+            # and let a decoder thread waiting for input finish
+            await self.audio_queue.close()
+            if self._on_close is not None:
+                self._on_close(self)
+            websocket, self.websocket = self.websocket, None
+            if websocket is not None:
+                try:
+                    await websocket.close()
+                except Exception:
+                    pass
+
+    async def publish(self, message: BaseModel):
+        message.seq = self._next_seq
+        self._next_seq += 1
+        self._replay.append((message.seq, message.model_dump_json()))
+        await self._flush()
+
+    async def send_control(self, message: BaseModel):
+        """
+        Send a message to the current connection only; it is not replayed.
+        """
+        websocket = self.websocket
+        if websocket is None:
+            return
+        try:
+            await websocket.send_text(message.model_dump_json())
+        except Exception:
+            self.detach(websocket)
+
+    async def attach(self, websocket, last_seq: int = -1, resumed: bool = False):
+        """
+        Make websocket the session's connection and send it every kept
+        message after last_seq.
+        """
+        self._cancel_expiry()
+        async with self._send_lock:
+            self.websocket = websocket
+            self._sent_seq = last_seq
+            await websocket.send_text(SessionEvent(
+                type="resumed" if resumed else "session",
+                session_id=self.session_id,
+                last_seq=self.last_seq,
+                audio_offset=self.audio_offset,
+            ).model_dump_json())
+        await self._flush()
+
+    def detach(self, websocket):
+        """
+        The connection is gone; wait for a resume before ending the stream.
+        """
+        if self.websocket is not websocket:
+            return  # already replaced by a newer connection
+        self.websocket = None
+        if self.task is not None and not self.task.done() and self._expiry is None:
+            self._expiry = asyncio.get_running_loop().call_later(self.resume_grace, self.end)
+
+    def end(self):
+        """
+        No more audio is coming: finish transcribing what was received.
+        """
+        self._cancel_expiry()
+        asyncio.ensure_future(self.audio_queue.close())
+
+    def _cancel_expiry(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+    async def _flush(self):
+        async with self._send_lock:
+            websocket = self.websocket
+            try:
+                # Publishing may go on while we send, so find the next message by seq each time
+                while websocket is not None and self._replay:
+                    index = max(0, self._sent_seq + 1 - self._replay[0][0])
+                    if index >= len(self._replay):
+                        break
+                    seq, message = self._replay[index]
+                    started = time.perf_counter()
+                    await websocket.send_text(message)
+                    self.service.timings.observe("send", time.perf_counter() - started)
+                    self._sent_seq = seq
+            except Exception:
+                self.detach(websocket)
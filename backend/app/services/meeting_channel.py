@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncGenerator, AsyncIterable, Optional
+
+from app.core.config import settings
+from app.core.metrics import ERRORS
+from app.models.transcript import TranscriptEvent
+from app.services.state_backend import StateBackend
+
+logger = logging.getLogger(__name__)
+
+def meeting_channel(meeting_id: str) -> str:
+    return f"meeting:{meeting_id}"
+
+
+class MeetingPublisher:
+    """
+    Publishes a meeting's transcript events on its channel in the state
+    backend, so viewers and archivers on any worker can follow whichever
+    worker is transcribing it.
+
+    Events go out in order from a background task, so a slow backend never
+    holds up transcription; beyond max_pending unsent events the oldest
+    are dropped.
+    """
+    def __init__(self, backend: StateBackend, meeting_id: str, max_pending: Optional[int] = None):
+        self.backend = backend
+        self.channel = meeting_channel(meeting_id)
+        self.max_pending = max_pending or settings.MEETING_PUBLISH_MAX_PENDING
+        self.dropped = 0
+
+        self._pending = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._sender: Optional[asyncio.Task] = None
+
+    async def publish(self, events: AsyncIterable[TranscriptEvent]) -> AsyncGenerator[TranscriptEvent, None]:
+        """
+        Pass events through unchanged, publishing each one.
+        """
+        self._sender = asyncio.create_task(self._send())
+        try:
+            async for event in events:
+                # Errors are about this connection, not the meeting
+                if event.type != "error":
+                    if len(self._pending) >= self.max_pending:
+                        self._pending.popleft()
+                        self.dropped += 1
+                    self._pending.append(event.model_dump_json())
+                    self._ready.set()
+                yield event
+        finally:
+            # The sender finishes what is queued, then stops
+            self._closed = True
+            self._ready.set()
+
+    async def _send(self):
+        while True:
+            while self._pending:
+                message = self._pending.popleft()
+                try:
+                    await self.backend.publish(self.channel, message)
+                except Exception as e:
+                    logger.warning("Publishing to %s failed: %s", self.channel, e)
+                    ERRORS.inc(stage="publish")
+            if self._closed:
+                return
+            self._ready.clear()
+            await self._ready.wait()
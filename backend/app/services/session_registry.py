@@ -0,0 +1,215 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import ERRORS
+from app.services.live_session import LiveSession
+from app.services.state_backend import StateBackend, Subscription
+
+logger = logging.getLogger(__name__)
+
+# Entries left behind by a worker that died are forgotten after this long
+SESSION_KEY_TTL = 24 * 3600.0
+
+class _RemoteConnection:
+    """
+    Stand-in, on the worker running a session, for a client socket held
+    by another worker: sends go out on the connection's relay channel and
+    audio arrives through the worker channel.
+    """
+    def __init__(self, backend: StateBackend, conn_id: str):
+        self.backend = backend
+        self.channel = f"relay:{conn_id}"
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send_text(self, text: str):
+        await self.backend.publish(self.channel, json.dumps({"type": "text", "text": text}))
+
+    async def close(self, code: int = 1000):
+        await self.backend.publish(self.channel, json.dumps({"type": "close", "code": code}))
+
+    async def receive(self) -> Dict:
+        """
+        The client's next frame, as an ASGI WebSocket message.
+        """
+        message = await self.inbox.get()
+        if message["type"] == "audio":
+            return {"type": "websocket.receive", "bytes": base64.b64decode(message["data"])}
+        if message["type"] == "text":
+            return {"type": "websocket.receive", "text": message["text"]}
+        return {"type": "websocket.disconnect", "code": message.get("code", 1006)}
+
+
+class SessionRegistry:
+    """
+    Which worker runs each live session, kept in the state backend so a
+    client can reconnect to any worker behind the load balancer.
+
+    Transcription stays on the worker that started the session. A client
+    that resumes on another worker is relayed: that worker forwards its
+    audio on the owner's worker channel, and the owner sends the session's
+    messages back on a channel for that connection.
+    """
+    def __init__(
+        self,
+        backend: StateBackend,
+        local: Dict[str, LiveSession],
+        serve: Callable[[object, LiveSession, int], Awaitable[None]],
+        worker_id: Optional[str] = None,
+        relay_timeout: Optional[float] = None,
+    ):
+        self.backend = backend
+        self.local = local    # sessions running on this worker
+        self._serve = serve   # attaches a connection to a local session and feeds it audio
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.relay_timeout = relay_timeout if relay_timeout is not None else settings.SESSION_RELAY_TIMEOUT
+
+        self._remotes: Dict[str, _RemoteConnection] = {}
+        self._inbox: Optional[Subscription] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._inbox = await self.backend.subscribe(f"worker:{self.worker_id}")
+        self._task = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._inbox is not None:
+            await self._inbox.close()
+
+    async def register(self, session: LiveSession, meeting_id: str):
+        try:
+            await self.backend.set(
+                f"session:{session.session_id}",
+                json.dumps({"worker": self.worker_id, "meeting_id": meeting_id}),
+                ttl=SESSION_KEY_TTL,
+            )
+        except Exception as e:
+            # The session still works, it just cannot resume on another worker
+            logger.warning("Session registry write failed: %s", e)
+            ERRORS.inc(stage="state")
+
+    def unregister(self, session: LiveSession):
+        asyncio.ensure_future(self._delete(session.session_id))
+
+    async def _delete(self, session_id: str):
+        try:
+            await self.backend.delete(f"session:{session_id}")
+        except Exception as e:
+            logger.warning("Session registry delete failed: %s", e)
+            ERRORS.inc(stage="state")
+
+    async def owner(self, session_id: str) -> Optional[str]:
+        """
+        Worker id running the session, if any worker has it.
+        """
+        try:
+            value = await self.backend.get(f"session:{session_id}")
+        except Exception as e:
+            logger.warning("Session registry read failed: %s", e)
+            ERRORS.inc(stage="state")
+            return None
+        return json.loads(value)["worker"] if value else None
+
+    async def relay(self, websocket, session_id: str, last_seq: int) -> bool:
+        """
+        Resume a session running on another worker over this connection,
+        until the client or the session goes away. False if no other
+        worker has the session.
+        """
+        owner = await self.owner(session_id)
+        if owner is None or owner == self.worker_id:
+            return False
+
+        conn_id = uuid.uuid4().hex
+        replies = await self.backend.subscribe(f"relay:{conn_id}")
+        try:
+            await self._send(owner, {"type": "attach", "conn": conn_id, "session_id": session_id, "last_seq": last_seq})
+            try:
+                first = json.loads(await asyncio.wait_for(replies.__anext__(), self.relay_timeout))
+            except (asyncio.TimeoutError, StopAsyncIteration):
+                return False  # the worker is gone
+            if first["type"] != "text":
+                return False  # the session ended
+            await websocket.send_text(first["text"])
+
+            forward = asyncio.create_task(self._forward(replies, websocket))
+            code = 1006  # unless the client says otherwise, it dropped
+            try:
+                while True:
+                    frame = await websocket.receive()
+                    if frame["type"] == "websocket.disconnect":
+                        code = frame.get("code", 1005)
+                        break
+                    if frame.get("bytes") is not None:
+                        data = base64.b64encode(frame["bytes"]).decode()
+                        await self._send(owner, {"type": "audio", "conn": conn_id, "data": data})
+                    elif frame.get("text") is not None:
+                        await self._send(owner, {"type": "text", "conn": conn_id, "text": frame["text"]})
+            except Exception:
+                pass
+            finally:
+                forward.cancel()
+                await self._send(owner, {"type": "disconnect", "conn": conn_id, "code": code})
+            return True
+        finally:
+            await replies.close()
+
+    async def _forward(self, replies: Subscription, websocket):
+        try:
+            async for raw in replies:
+                message = json.loads(raw)
+                if message["type"] == "close":
+                    await websocket.close(code=message.get("code", 1000))
+                    return
+                await websocket.send_text(message["text"])
+        except Exception:
+            pass  # the client is gone; the receive loop notices
+
+    async def _send(self, worker_id: str, message: Dict):
+        try:
+            await self.backend.publish(f"worker:{worker_id}", json.dumps(message))
+        except Exception as e:
+            logger.warning("Relay to worker %s failed: %s", worker_id, e)
+            ERRORS.inc(stage="state")
+
+    async def _listen(self):
+        """
+        Handle relayed connections to sessions on this worker.
+        """
+        async for raw in self._inbox:
+            try:
+                message = json.loads(raw)
+                conn_id = message["conn"]
+                if message["type"] == "attach":
+                    self._attach(conn_id, message["session_id"], message.get("last_seq", -1))
+                else:
+                    remote = self._remotes.get(conn_id)
+                    if remote is not None:
+                        remote.inbox.put_nowait(message)
+            except Exception as e:
+                logger.warning("Bad relay message: %s", e)
+
+    def _attach(self, conn_id: str, session_id: str, last_seq: int):
+        session = self.local.get(session_id)
+        remote = _RemoteConnection(self.backend, conn_id)
+        if session is None:
+            asyncio.ensure_future(remote.close())
+            return
+        self._remotes[conn_id] = remote
+        task = asyncio.create_task(self._serve_remote(remote, session, last_seq))
+        task.add_done_callback(lambda _: self._remotes.pop(conn_id, None))
+
+    async def _serve_remote(self, remote: _RemoteConnection, session: LiveSession, last_seq: int):
+        try:
+            await self._serve(remote, session, last_seq)
+        except Exception as e:
+            logger.warning("Relayed connection to session %s failed: %s", session.session_id, e)
+            session.detach(remote)
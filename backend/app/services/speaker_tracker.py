@@ -0,0 +1,237 @@
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.transcript import Word
+
+HOP = 0.01  # seconds between feature frames
+PITCH_WEIGHT = 3.0  # distance per octave of pitch difference
+
+@lru_cache(maxsize=4)
+def _filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """
+    Triangular mel filters over the rfft bins.
+    """
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(60.0), to_mel(sample_rate / 2 * 0.95), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+@lru_cache(maxsize=4)
+def _dct(n_mels: int, n_ceps: int) -> np.ndarray:
+    n = np.arange(n_mels)
+    k = np.arange(n_ceps)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+
+def voice_features(audio, sample_rate: int, n_mels: int = 26, n_ceps: int = 13) -> np.ndarray:
+    """
+    Per-frame voice features of 16-bit PCM, one row per 10 ms of 25 ms
+    windows: MFCC-style cepstral coefficients without c0 (so loudness does
+    not count), then log2 of the pitch, NaN where the frame is unvoiced.
+    """
+    samples = np.frombuffer(audio, dtype="<i2").astype(np.float32)
+    frame = int(0.025 * sample_rate)
+    hop = int(HOP * sample_rate)
+    if len(samples) < frame:
+        return np.zeros((0, n_ceps), dtype=np.float32)
+
+    # Long enough that the autocorrelation does not wrap for any pitch lag
+    min_lag, max_lag = sample_rate // 400, sample_rate // 70
+    n_fft = 1 << (frame + max_lag).bit_length()
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, frame)[::hop] * np.hamming(frame).astype(np.float32)
+    power = (np.abs(np.fft.rfft(frames, n_fft)) ** 2).astype(np.float32)
+
+    log_mel = np.log(power @ _filterbank(sample_rate, n_fft, n_mels).T + 1.0)
+    cepstra = log_mel @ _dct(n_mels, n_ceps)[1:].T
+
+    # Pitch from the strongest autocorrelation peak in the speaking range
+    autocorr = np.fft.irfft(power, n_fft)[:, :max_lag + 1]
+    lag = min_lag + np.argmax(autocorr[:, min_lag:], axis=1)
+    voiced = autocorr[np.arange(len(lag)), lag] > 0.3 * autocorr[:, 0]
+    pitch = np.where(voiced, np.log2(sample_rate / lag), np.nan).astype(np.float32)
+
+    return np.column_stack([cepstra, pitch])
+
+
+class _Profile:
+    """Running voice fingerprint of one session speaker."""
+    def __init__(self):
+        self.fingerprint: Optional[np.ndarray] = None
+        self.duration = 0.0
+
+    def update(self, fingerprint: np.ndarray, duration: float, memory: float = 60.0):
+        if self.fingerprint is None:
+            self.fingerprint = fingerprint
+        else:
+            # Weighted by speech duration; capped so the profile keeps adapting
+            weight = duration / (min(self.duration, memory) + duration)
+            updated = self.fingerprint + weight * (fingerprint - self.fingerprint)
+            updated = np.where(np.isnan(fingerprint), self.fingerprint, updated)
+            self.fingerprint = np.where(np.isnan(self.fingerprint), fingerprint, updated)
+        self.duration += duration
+
+
+class SpeakerTracker:
+    """
+    Maps the speaker labels diarization returns for each segment, which are
+    only meaningful within that segment, to ids that are stable for the
+    whole session.
+
+    A segment's labels are matched to known speakers first by the words it
+    shares with the previous segment in their overlap, then by comparing
+    voice fingerprints (cepstra and pitch) with each speaker's running profile.
+    Labels that match nobody become new speakers. Work per segment depends
+    only on its length and the number of speakers, not on session length.
+    """
+    def __init__(
+        self,
+        match_distance: Optional[float] = None,
+        history: float = 5.0,
+        tolerance: float = 0.3,
+        min_voiced: float = 1.0,
+    ):
+        self.match_distance = match_distance if match_distance is not None else settings.SPEAKER_MATCH_DISTANCE
+        self.history = history        # seconds of assigned words kept for overlap matching
+        self.tolerance = tolerance    # how far apart the same word may be placed
+        self.min_voiced = min_voiced  # seconds of speech for a fingerprint to count on its own
+
+        self._recent = deque()  # (midpoint, text, speaker) of recently assigned words
+        self._profiles: Dict[str, _Profile] = {}
+        self._spread: Optional[np.ndarray] = None
+
+    @property
+    def speaker_count(self) -> int:
+        return len(self._profiles)
+
+    def assign(self, words: List[Word], features: Optional[np.ndarray], offset: float) -> List[Word]:
+        """
+        Relabel a segment's words with session speaker ids.
+        features are the segment's voice_features, which start at offset
+        seconds on the session timeline; without them only overlap counts.
+        """
+        labels = list(dict.fromkeys(word.speaker_id for word in words if word.speaker_id is not None))
+        if not labels:
+            return words
+
+        fingerprints = self._fingerprints(words, labels, features, offset)
+        mapping = self._match(words, labels, fingerprints)
+
+        for label in labels:
+            if label not in mapping:
+                mapping[label] = f"speaker_{len(self._profiles)}"
+                self._profiles[mapping[label]] = _Profile()
+            if label in fingerprints:
+                self._profiles[mapping[label]].update(*fingerprints[label])
+
+        assigned = [
+            word if word.speaker_id is None else word.model_copy(update={"speaker_id": mapping[word.speaker_id]})
+            for word in words
+        ]
+        self._remember(assigned)
+        return assigned
+
+    def _fingerprints(self, words, labels, features, offset):
+        """
+        Mean and spread of each label's cepstra over the frames of its words,
+        and its median pitch.
+        """
+        if features is None or not len(features):
+            return {}
+        spans: Dict[str, List[np.ndarray]] = {label: [] for label in labels}
+        for word in words:
+            if word.speaker_id is None:
+                continue
+            first = max(0, int((word.start - offset) / HOP))
+            last = min(len(features), int((word.end - offset) / HOP) + 1)
+            if last > first:
+                spans[word.speaker_id].append(features[first:last])
+
+        fingerprints = {}
+        speech = []
+        for label, frames in spans.items():
+            if not frames:
+                continue
+            frames = np.concatenate(frames)
+            cepstra, pitch = frames[:, :-1], frames[:, -1]
+            voiced = pitch[~np.isnan(pitch)]
+            fingerprints[label] = (
+                np.concatenate([
+                    cepstra.mean(axis=0),
+                    cepstra.std(axis=0),
+                    [np.median(voiced) if len(voiced) else np.nan],
+                ]),
+                len(frames) * HOP,
+            )
+            speech.append(cepstra)
+
+        # Typical frame-to-frame spread of each coefficient in this session,
+        # so distances do not hinge on the coefficients with the widest range
+        if speech:
+            spread = np.concatenate(speech).std(axis=0) + 1e-3
+            self._spread = spread if self._spread is None else 0.9 * self._spread + 0.1 * spread
+        return fingerprints
+
+    def _distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        scale = np.concatenate([self._spread, self._spread, [1.0 / PITCH_WEIGHT]])
+        return float(np.sqrt(np.nanmean(((a - b) / scale) ** 2)))
+
+    def _match(self, words, labels, fingerprints) -> Dict[str, str]:
+        candidates = []
+
+        # Words heard again in the overlap are the strongest evidence
+        if self._recent:
+            votes: Counter = Counter()
+            for word in words:
+                middle = (word.start + word.end) / 2
+                if middle > self._recent[-1][0] + self.tolerance:
+                    break
+                if word.speaker_id is None:
+                    continue
+                text = word.text.strip().lower()
+                for seen_middle, seen_text, speaker in self._recent:
+                    if abs(seen_middle - middle) <= self.tolerance and seen_text == text:
+                        votes[(word.speaker_id, speaker)] += 1
+                        break
+            for (label, speaker), count in votes.items():
+                candidates.append((0, -count, label, speaker))
+
+        # Then the closest voice, if close enough; short stretches of speech
+        # give noisy fingerprints and must be a clearer match
+        for label, (fingerprint, duration) in fingerprints.items():
+            limit = self.match_distance if duration >= self.min_voiced else self.match_distance / 2
+            for speaker, profile in self._profiles.items():
+                if profile.fingerprint is None:
+                    continue
+                distance = self._distance(fingerprint, profile.fingerprint)
+                if distance <= limit:
+                    candidates.append((1, distance, label, speaker))
+
+        # Best evidence first; one label per speaker and vice versa
+        mapping: Dict[str, str] = {}
+        for _, _, label, speaker in sorted(candidates):
+            if label not in mapping and speaker not in mapping.values():
+                mapping[label] = speaker
+        return mapping
+
+    def _remember(self, words: List[Word]):
+        for word in words:
+            if word.speaker_id is not None:
+                self._recent.append(((word.start + word.end) / 2, word.text.strip().lower(), word.speaker_id))
+        if self._recent:
+            horizon = self._recent[-1][0] - self.history
+            while self._recent and self._recent[0][0] < horizon:
+                self._recent.popleft()
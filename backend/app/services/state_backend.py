@@ -0,0 +1,180 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+class Subscription(ABC):
+    """
+    Messages published to a channel after subscribing, in order.
+    Use as an async context manager so the subscription is closed.
+    """
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self
+
+    @abstractmethod
+    async def __anext__(self) -> str:
+        ...
+
+    async def close(self):
+        pass
+
+
+class StateBackend(ABC):
+    """
+    State shared by the workers serving the app: expiring string keys and
+    publish/subscribe channels.
+    """
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        """
+        Start listening on channel; messages published once this returns are received.
+        """
+
+    async def close(self):
+        pass
+
+
+class _MemorySubscription(Subscription):
+    def __init__(self, backend: "InMemoryBackend", channel: str):
+        self._backend = backend
+        self._channel = channel
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def __anext__(self) -> str:
+        message = await self._queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def close(self):
+        subscribers = self._backend._channels.get(self._channel)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self._backend._channels[self._channel]
+        self._queue.put_nowait(None)
+
+
+class InMemoryBackend(StateBackend):
+    """
+    State in this process only: enough for a single worker.
+    """
+    def __init__(self):
+        self._values: Dict[str, Tuple[Optional[float], str]] = {}  # key -> (expires at, value)
+        self._channels: Dict[str, Set[_MemorySubscription]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._values[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+
+    async def delete(self, key: str):
+        self._values.pop(key, None)
+
+    async def publish(self, channel: str, message: str):
+        for subscription in self._channels.get(channel, ()):
+            subscription._queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = _MemorySubscription(self, channel)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def close(self):
+        for subscribers in list(self._channels.values()):
+            for subscription in list(subscribers):
+                await subscription.close()
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def __anext__(self) -> str:
+        while True:
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if message is not None and message["type"] == "message":
+                return message["data"]
+
+    async def close(self):
+        await self._pubsub.aclose()
+
+
+class RedisBackend(StateBackend):
+    """
+    State in a Redis server (or anything speaking its protocol), shared
+    by every worker and node that points at it.
+    Needs the optional redis package.
+    """
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        await self._client.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+    async def publish(self, channel: str, message: str):
+        await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        # Each subscription holds a connection of its own
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(channel)
+        # Publishes from other connections only reach us once the server confirms
+        while True:
+            message = await pubsub.get_message(timeout=None)
+            if message is not None and message["type"] == "subscribe":
+                return _RedisSubscription(pubsub)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_state_backend(url: Optional[str] = None) -> StateBackend:
+    """
+    Backend for a URL: memory:// or redis://host:port/db.
+    """
+    url = url if url is not None else settings.STATE_BACKEND_URL
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url in ("", "memory://"):
+        return InMemoryBackend()
+    raise ValueError(f"Unsupported state backend URL: {url}")
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def cache_key(audio, **params) -> str:
+    """
+    Content hash of the audio plus the request parameters that shape the result.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(memoryview(audio).cast("B"))
+    return digest.hexdigest()
+
+
+class STTResultCache:
+    """
+    Content-addressed cache of STT responses, so replayed or identical
+    segments are not sent to the API again.
+
+    Entries live in an in-memory LRU bounded by count and age, with an
+    optional directory of JSON files behind it that outlives restarts.
+    Identical requests already in flight share one API call.
+    """
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.STT_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.STT_CACHE_TTL
+        self.directory = directory if directory is not None else settings.STT_CACHE_DIR
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else settings.STT_CACHE_MAX_DISK_ENTRIES
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()  # key -> (stored at, response)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[object]]) -> object:
+        """
+        Cached response for key, or the result of fetch() stored under it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        # Someone is already fetching this exact audio: wait for their result,
+        # unless their session gives up on it first
+        future = self._in_flight.get(key)
+        while future is not None:
+            try:
+                response = await asyncio.shield(future)
+                self.hits += 1
+                return response
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            future = self._in_flight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await asyncio.to_thread(self._read, key) if self.directory else None
+            if response is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                response = await fetch()
+                if self.directory:
+                    await asyncio.to_thread(self._save, key, response)
+            self._store(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Waiters see the failure too; nothing is cached
+            future.set_exception(e)
+            future.exception()  # retrieved here, so an unwatched failure is not logged
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def _store(self, key: str, response: object):
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[object]:
+        from elevenlabs.types import SpeechToTextChunkResponseModel
+
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return SpeechToTextChunkResponseModel.model_validate_json(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, key: str, response: object):
+        if not hasattr(response, "model_dump_json"):
+            return
+        path = self._path(key)
+        try:
+            with open(f"{path}.tmp", "w") as f:
+                f.write(response.model_dump_json())
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning("STT cache write failed: %s", e)
+            return
+
+        # Trim the oldest files now and then rather than on every write
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune()
+
+    def _prune(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,169 @@
+import asyncio
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable
+
+from app.core.config import settings
+
+class FairLimiter:
+    """
+    Global concurrency limit shared by many sessions.
+    When slots are scarce, waiting sessions are served round-robin so one
+    busy session cannot starve the others.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: Dict[Hashable, deque] = {}
+        self._order = deque()  # sessions with waiters, next to be served first
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, session: Hashable):
+        if self.active < self.limit and not self._order:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiters.get(session)
+        if queue is None:
+            queue = self._waiters[session] = deque()
+            self._order.append(session)
+        queue.append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we were cancelled: hand it on
+                self.release()
+            else:
+                self._discard(session, future)
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self.active < self.limit and self._order:
+            session = self._order.popleft()
+            queue = self._waiters[session]
+            future = queue.popleft()
+            if queue:
+                self._order.append(session)
+            else:
+                del self._waiters[session]
+
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    def _discard(self, session: Hashable, future: asyncio.Future):
+        queue = self._waiters.get(session)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        if not queue:
+            del self._waiters[session]
+            self._order.remove(session)
+
+
+class STTClientPool:
+    """
+    App-wide ElevenLabs client shared by every transcription session.
+    Holds one keep-alive HTTP connection pool, a dedicated executor for the
+    blocking SDK calls and a global limit on concurrent requests.
+
+    The SDK takes most of a second to import and set up, so the client is
+    built on first use, on an executor thread, or by warm_up().
+    """
+    def __init__(self, max_concurrency: int = None, timeout: float = None):
+        self.max_concurrency = max(1, max_concurrency or settings.STT_MAX_CONCURRENCY)
+        self.timeout = timeout or settings.STT_TIMEOUT
+
+        self._client = None
+        self._http = None
+        self._client_lock = threading.Lock()
+
+        # No more threads than requests we allow in flight
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="stt")
+        self._limiter = FairLimiter(self.max_concurrency)
+
+    @property
+    def client(self):
+        """
+        The ElevenLabs client; blocks while it is built on first access.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import httpx
+                    from elevenlabs import ElevenLabs
+
+                    self._http = httpx.Client(
+                        timeout=self.timeout,
+                        limits=httpx.Limits(
+                            max_connections=self.max_concurrency,
+                            max_keepalive_connections=self.max_concurrency,
+                        ),
+                    )
+                    self._client = ElevenLabs(
+                        api_key=settings.ELEVENLABS_API_KEY,
+                        base_url=settings.ELEVENLABS_BASE_URL,
+                        timeout=self.timeout,
+                        httpx_client=self._http,
+                    )
+        return self._client
+
+    def warm_up(self):
+        """
+        Build the client now rather than on the first request. Blocking.
+        """
+        self.client
+
+    @property
+    def active(self) -> int:
+        return self._limiter.active
+
+    @property
+    def waiting(self) -> int:
+        return self._limiter.waiting
+
+    async def convert(self, session: Hashable, **kwargs):
+        """
+        Run speech_to_text.convert on the pool once the session gets a slot.
+        """
+        await self._limiter.acquire(session)
+
+        loop = asyncio.get_running_loop()
+        try:
+            # The client is looked up on the executor thread, so the first
+            # request builds it there instead of stalling the event loop
+            future = loop.run_in_executor(self._executor, functools.partial(self._convert, **kwargs))
+        except BaseException:
+            self._limiter.release()
+            raise
+
+        # The slot is held until the thread finishes, even if the caller
+        # gives up waiting, so the executor never queues past the limit.
+        future.add_done_callback(self._on_done)
+        return await asyncio.shield(future)
+
+    def _convert(self, **kwargs):
+        return self.client.speech_to_text.convert(**kwargs)
+
+    def _on_done(self, future: asyncio.Future):
+        self._limiter.release()
+        if not future.cancelled():
+            # Mark the outcome as seen; an abandoned caller won't read it
+            future.exception()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._http is not None:
+            self._http.close()
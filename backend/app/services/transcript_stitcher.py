@@ -0,0 +1,78 @@
+import re
+from collections import deque
+from typing import List
+
+from app.models.transcript import Word
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", text.lower())
+
+
+class TranscriptStitcher:
+    """
+    Join per-segment word lists into a single session transcript.
+
+    Words must already carry absolute stream times (segment start sample
+    plus the API's relative time). A segment may repeat the tail of the
+    previous one; words in that region are aligned against the words
+    already emitted and duplicates are dropped.
+    """
+    def __init__(self, overlap_duration: float = 0.5, tolerance: float = 0.3):
+        self.tolerance = tolerance
+        self.window = overlap_duration + tolerance  # how far back alignment looks
+
+        self._tail = deque()  # recently emitted (normalized text, Word)
+        self.last_end = 0.0
+
+    def stitch(self, words: List[Word], commit: bool = True) -> List[Word]:
+        """
+        Return the words of a new segment that were not emitted yet.
+        With commit=False the words are not recorded as emitted, for
+        interim hypotheses that a final result will replace.
+        """
+        if not words:
+            return []
+
+        # Only words that start before the emitted horizon can be repeats
+        horizon = self.last_end + self.tolerance
+        overlap = 0
+        while overlap < len(words) and words[overlap].start < horizon:
+            overlap += 1
+
+        cut = self._align(words[:overlap])
+
+        kept = []
+        for word in words[cut:]:
+            if not kept:
+                # Skip the rest of the audio the previous segment covered
+                if (word.start + word.end) / 2 < self.last_end:
+                    continue
+                if word.start < self.last_end:
+                    word = word.model_copy(update={"start": self.last_end, "end": max(word.end, self.last_end)})
+            kept.append(word)
+
+        if not commit:
+            return kept
+
+        for word in kept:
+            self._tail.append((_normalize(word.text), word))
+            self.last_end = max(self.last_end, word.end)
+        while self._tail and self._tail[0][1].end < self.last_end - self.window:
+            self._tail.popleft()
+        return kept
+
+    def _align(self, overlap: List[Word]) -> int:
+        """
+        Find the newest emitted word repeated in the overlap region and
+        return the index just past its repeat, or 0 if none matches.
+        """
+        for text, emitted in reversed(self._tail):
+            if not text:
+                continue
+            for i in range(len(overlap) - 1, -1, -1):
+                word = overlap[i]
+                if _normalize(word.text) == text and abs(word.start - emitted.start) <= self.tolerance:
+                    return i + 1
+        return 0
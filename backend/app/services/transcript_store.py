@@ -0,0 +1,312 @@
+import asyncio
+import datetime
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, AsyncIterable, Dict, List, Optional
+
+from app.core.metrics import ERRORS
+from app.models.transcript import TranscriptEvent, TranscriptSegment, Word
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    title TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    segment_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS meetings_updated ON meetings (updated_at DESC);
+CREATE INDEX IF NOT EXISTS meetings_created ON meetings (created_at);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    meeting_id TEXT NOT NULL,
+    speaker_id TEXT,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    text TEXT NOT NULL,
+    words TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_time ON segments (meeting_id, start);
+CREATE INDEX IF NOT EXISTS segments_speaker ON segments (meeting_id, speaker_id, start);
+"""
+
+# Full-text index over segment text, kept current by a trigger on insert
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE segments_fts USING fts5(
+    text, content='segments', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER segments_fts_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER segments_fts_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+-- Index segments stored before full-text search existed
+INSERT INTO segments_fts (segments_fts) VALUES ('rebuild');
+"""
+
+_TOKEN = re.compile(r"\w+")
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class TranscriptStore:
+    """
+    Embedded SQLite store for meeting transcripts.
+
+    Segments are indexed by meeting, speaker and start time. All queries
+    run on one dedicated thread, which owns the connection.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcript-store")
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor.submit(self._open).result()
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        has_fts = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'segments_fts'"
+        ).fetchone()
+        if not has_fts:
+            self._db.executescript(_FTS_SCHEMA)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.submit(self._db.close).result()
+        self._executor.shutdown()
+
+    async def ensure_meeting(self, meeting_id: str, title: Optional[str] = None):
+        await self._run(self._ensure_meeting, meeting_id, title)
+
+    def _ensure_meeting(self, meeting_id: str, title: Optional[str]):
+        now = _now()
+        with self._db:
+            self._db.execute(
+                "INSERT INTO meetings (meeting_id, title, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (meeting_id) DO UPDATE SET title = COALESCE(excluded.title, title)",
+                (meeting_id, title, now, now),
+            )
+
+    async def add_segments(self, meeting_id: str, segments: List[TranscriptSegment]):
+        if segments:
+            await self._run(self._add_segments, meeting_id, segments)
+
+    def _add_segments(self, meeting_id: str, segments: List[TranscriptSegment]):
+        now = _now()
+        with self._db:
+            self._db.execute(
+                "INSERT INTO meetings (meeting_id, created_at, updated_at, segment_count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (meeting_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                "segment_count = segment_count + excluded.segment_count",
+                (meeting_id, now, now, len(segments)),
+            )
+            self._db.executemany(
+                'INSERT INTO segments (meeting_id, speaker_id, start, "end", text, words) VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        meeting_id,
+                        segment.speaker_id,
+                        segment.start,
+                        segment.end,
+                        segment.text,
+                        json.dumps([word.model_dump() for word in segment.words]),
+                    )
+                    for segment in segments
+                ],
+            )
+
+    async def get_meeting(self, meeting_id: str) -> Optional[Dict]:
+        return await self._run(self._get_meeting, meeting_id)
+
+    def _get_meeting(self, meeting_id: str) -> Optional[Dict]:
+        row = self._db.execute("SELECT * FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def list_meetings(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        return await self._run(self._list_meetings, offset, limit)
+
+    def _list_meetings(self, offset: int, limit: int) -> List[Dict]:
+        # Meetings created but never recorded have nothing to list
+        rows = self._db.execute(
+            "SELECT * FROM meetings WHERE segment_count > 0 ORDER BY updated_at DESC, meeting_id LIMIT ? OFFSET ?",
+            (limit, offset),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    async def get_segments(
+        self,
+        meeting_id: str,
+        speaker_id: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> List[TranscriptSegment]:
+        """
+        Segments of a meeting in time order, optionally for one speaker
+        and overlapping the [start, end] time range.
+        """
+        return await self._run(self._get_segments, meeting_id, speaker_id, start, end, offset, limit)
+
+    def _get_segments(self, meeting_id, speaker_id, start, end, offset, limit) -> List[TranscriptSegment]:
+        query = "SELECT speaker_id, start, \"end\", text, words FROM segments WHERE meeting_id = ?"
+        params: list = [meeting_id]
+        if speaker_id is not None:
+            query += " AND speaker_id = ?"
+            params.append(speaker_id)
+        if start is not None:
+            query += ' AND "end" >= ?'
+            params.append(start)
+        if end is not None:
+            query += " AND start <= ?"
+            params.append(end)
+        query += " ORDER BY start, id LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        return [
+            TranscriptSegment(
+                text=row["text"],
+                speaker_id=row["speaker_id"],
+                start=row["start"],
+                end=row["end"],
+                words=[Word(**word) for word in json.loads(row["words"])],
+            )
+            for row in self._db.execute(query, params)
+        ]
+
+    async def search(
+        self,
+        query: str,
+        meeting_id: Optional[str] = None,
+        speaker_id: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> List[Dict]:
+        """
+        Full-text search over segment text, best matches first.
+
+        Every word of the query must appear in a hit. start/end restrict
+        the time within the meeting (seconds); since/until restrict the
+        meeting's creation date (ISO 8601).
+        """
+        return await self._run(
+            self._search, query, meeting_id, speaker_id, start, end, since, until, offset, limit
+        )
+
+    def _search(self, query, meeting_id, speaker_id, start, end, since, until, offset, limit) -> List[Dict]:
+        # Quote each term so user input is never parsed as FTS syntax
+        terms = _TOKEN.findall(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"' for term in terms)
+
+        sql = (
+            "SELECT s.meeting_id, m.title, s.speaker_id, s.start, s.\"end\", s.text, "
+            "snippet(segments_fts, 0, '[', ']', '...', 12) AS snippet "
+            "FROM segments_fts "
+            "JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN meetings m ON m.meeting_id = s.meeting_id "
+            "WHERE segments_fts MATCH ?"
+        )
+        params: list = [match]
+        if meeting_id is not None:
+            sql += " AND s.meeting_id = ?"
+            params.append(meeting_id)
+        if speaker_id is not None:
+            sql += " AND s.speaker_id = ?"
+            params.append(speaker_id)
+        if start is not None:
+            sql += ' AND s."end" >= ?'
+            params.append(start)
+        if end is not None:
+            sql += " AND s.start <= ?"
+            params.append(end)
+        if since is not None:
+            sql += " AND m.created_at >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND m.created_at <= ?"
+            params.append(until)
+        sql += " ORDER BY bm25(segments_fts) LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        return [dict(row) for row in self._db.execute(sql, params)]
+
+
+class TranscriptRecorder:
+    """
+    Collects a live session's final words into speaker-turn segments and
+    saves each one when the STT segment that produced it completes.
+    """
+    def __init__(self, store: TranscriptStore, meeting_id: str):
+        self.store = store
+        self.meeting_id = meeting_id
+        self._words: List[Word] = []
+
+    async def record(self, events: AsyncIterable[TranscriptEvent]) -> AsyncGenerator[TranscriptEvent, None]:
+        """
+        Pass events through unchanged, saving segments along the way.
+        """
+        async for event in events:
+            yield event
+            if event.type == "word" and event.is_final:
+                self._words.append(
+                    Word(text=event.text, start=event.start, end=event.end, speaker_id=event.speaker_id)
+                )
+            elif event.type == "segment_complete":
+                await self.flush()
+        await self.flush()
+
+    async def flush(self):
+        words, self._words = self._words, []
+        try:
+            await self.store.add_segments(self.meeting_id, self.speaker_turns(words))
+        except Exception as e:
+            logger.warning("Transcript store error: %s", e)
+            ERRORS.inc(stage="store")
+
+    @staticmethod
+    def speaker_turns(words: List[Word]) -> List[TranscriptSegment]:
+        """
+        Group consecutive words by the same speaker into segments.
+        """
+        segments = []
+        turn: List[Word] = []
+        for word in words:
+            if not word.text.strip():
+                continue
+            if turn and word.speaker_id != turn[-1].speaker_id:
+                segments.append(TranscriptRecorder._segment(turn))
+                turn = []
+            turn.append(word)
+        if turn:
+            segments.append(TranscriptRecorder._segment(turn))
+        return segments
+
+    @staticmethod
+    def _segment(words: List[Word]) -> TranscriptSegment:
+        return TranscriptSegment(
+            text=" ".join(word.text.strip() for word in words),
+            speaker_id=words[0].speaker_id,
+            start=words[0].start,
+            end=words[-1].end,
+            words=words,
+        )
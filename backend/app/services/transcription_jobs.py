@@ -0,0 +1,231 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+import uuid
+from typing import AsyncIterable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import ERRORS
+from app.models.transcript import TranscriptionJob, TranscriptionJobResult, Word
+from app.services.audio_decoder import decode_file
+from app.services.audio_segmenter import silence_cuts
+from app.services.elevenlabs_service import ElevenLabsService
+from app.services.speaker_tracker import SpeakerTracker
+from app.services.stt_cache import STTResultCache
+from app.services.stt_pool import STTClientPool
+from app.services.transcript_store import TranscriptRecorder, TranscriptStore
+
+logger = logging.getLogger(__name__)
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class TranscriptionJobs:
+    """
+    Offline transcription of recorded meetings.
+
+    An upload is streamed to disk, decoded to PCM, cut at pauses into
+    chunks and the chunks are transcribed in parallel through
+    ElevenLabsService. Results are merged in order, with SpeakerTracker
+    keeping speaker ids consistent across chunks.
+
+    Finished jobs and their result files are kept for result_ttl seconds.
+    """
+    def __init__(
+        self,
+        pool: STTClientPool,
+        store: TranscriptStore,
+        cache: Optional[STTResultCache] = None,
+        directory: Optional[str] = None,
+        result_ttl: Optional[float] = None,
+    ):
+        self.pool = pool
+        self.store = store
+        self.cache = cache
+        self.directory = directory or settings.JOBS_DIR
+        self.result_ttl = result_ttl if result_ttl is not None else settings.JOB_RESULT_TTL
+        self.sample_rate = 16000
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._jobs: Dict[str, TranscriptionJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._expiry: Dict[str, asyncio.TimerHandle] = {}
+        self._sweep()
+
+    def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        return self._jobs.get(job_id)
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    async def create(self, chunks: AsyncIterable[bytes], codec: str, title: Optional[str] = None) -> TranscriptionJob:
+        """
+        Save an upload and start transcribing it in the background.
+        codec is "pcm_s16le_16" for raw PCM; anything else is decoded.
+        """
+        job_id = uuid.uuid4().hex
+        upload_path = os.path.join(self.directory, f"{job_id}.upload")
+        try:
+            await self._save_upload(chunks, upload_path)
+        except BaseException:
+            self._remove(upload_path)
+            raise
+
+        job = TranscriptionJob(
+            job_id=job_id,
+            status="queued",
+            title=title,
+            created_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        )
+        self._jobs[job_id] = job
+        task = asyncio.create_task(self._run(job, upload_path, codec))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return job
+
+    async def _save_upload(self, chunks: AsyncIterable[bytes], path: str):
+        size = 0
+        with open(path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.JOB_MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"Upload exceeds {settings.JOB_MAX_UPLOAD_BYTES} bytes")
+                await asyncio.to_thread(f.write, chunk)
+
+    async def _run(self, job: TranscriptionJob, upload_path: str, codec: str):
+        pcm_path = upload_path
+        try:
+            job.status = "processing"
+            if codec != "pcm_s16le_16":
+                pcm_path = os.path.join(self.directory, f"{job.job_id}.pcm")
+                await asyncio.to_thread(decode_file, upload_path, pcm_path, self.sample_rate)
+
+            words, duration = await self._transcribe_file(job, pcm_path)
+            segments = TranscriptRecorder.speaker_turns(words)
+            result = TranscriptionJobResult(
+                job_id=job.job_id,
+                duration=duration,
+                text=" ".join(segment.text for segment in segments),
+                segments=segments,
+            )
+            await asyncio.to_thread(self._write_result, result)
+
+            # Make the transcript searchable alongside live meetings
+            await self.store.ensure_meeting(job.job_id, job.title)
+            await self.store.add_segments(job.job_id, segments)
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Transcription job %s failed", job.job_id)
+            ERRORS.inc(stage="job")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self._remove(upload_path)
+            self._remove(pcm_path)
+            self._expiry[job.job_id] = asyncio.get_running_loop().call_later(self.result_ttl, self._evict, job.job_id)
+
+    def _evict(self, job_id: str):
+        self._expiry.pop(job_id, None)
+        self._jobs.pop(job_id, None)
+        self._remove(self.result_path(job_id))
+
+    def _sweep(self):
+        """
+        Clean up after an earlier process: its unfinished uploads go, and
+        its results expire result_ttl after they were written.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            job_id, extension = os.path.splitext(entry.name)
+            remaining = entry.stat().st_mtime + self.result_ttl - now if extension == ".json" else 0
+            if remaining <= 0:
+                self._remove(entry.path)
+            else:
+                self._expiry[job_id] = loop.call_later(remaining, self._evict, job_id)
+
+    async def _transcribe_file(self, job: TranscriptionJob, pcm_path: str):
+        """
+        Transcribe a PCM file chunk by chunk; returns merged words and duration.
+        """
+        size = os.path.getsize(pcm_path) // 2
+        if size == 0:
+            return [], 0.0
+        samples = np.memmap(pcm_path, dtype="<i2", mode="r", shape=(size,))
+        job.duration = size / self.sample_rate
+
+        cuts = await asyncio.to_thread(
+            silence_cuts, samples, self.sample_rate, settings.JOB_CHUNK_DURATION, settings.JOB_CHUNK_SEARCH
+        )
+        bounds = [0] + cuts + [size]
+        overlap = int(settings.JOB_CHUNK_OVERLAP * self.sample_rate)
+        job.chunks_total = len(bounds) - 1
+
+        # The whole job is one session on the shared pool, so it takes its
+        # fair turn next to live sessions instead of crowding them out
+        service = ElevenLabsService(self.pool, self.cache)
+        service.session_id = job.job_id
+        limiter = asyncio.Semaphore(max(1, settings.JOB_MAX_CONCURRENCY))
+
+        async def transcribe_chunk(start: int, end: int):
+            async with limiter:
+                for attempt in range(3):
+                    try:
+                        response, features = await service.transcribe_segment(memoryview(samples[start:end]), True)
+                        break
+                    except Exception:
+                        if attempt == 2:
+                            raise
+                        await asyncio.sleep(2 ** attempt)
+            job.chunks_done += 1
+            offset = start / self.sample_rate
+            return service.parse_words(response, offset), features, offset
+
+        # Each chunk after the first starts a little early, to share words with its predecessor
+        tasks = [
+            asyncio.create_task(transcribe_chunk(max(0, bounds[i] - overlap), bounds[i + 1]))
+            for i in range(len(bounds) - 1)
+        ]
+        try:
+            chunks = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Relabel speakers chunk by chunk in order, then keep the words
+        # before each cut from the earlier chunk
+        tracker = SpeakerTracker(history=max(5.0, 2 * settings.JOB_CHUNK_OVERLAP))
+        merged: List[Word] = []
+        for index, (words, features, offset) in enumerate(chunks):
+            cut = bounds[index] / self.sample_rate
+            for word in tracker.assign(words, features, offset):
+                if (word.start + word.end) / 2 >= cut:
+                    merged.append(word)
+        return merged, job.duration
+
+    def _write_result(self, result: TranscriptionJobResult):
+        path = self.result_path(result.job_id)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(result.model_dump_json())
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for handle in self._expiry.values():
+            handle.cancel()
@@ -1,11 +1,77 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import transcription, google_meet
+from fastapi.responses import PlainTextResponse
+from app.routers import transcription, google_meet, search
+from app.core import metrics
+from app.core.config import settings
+from app.core.log import TraceMiddleware, setup_logging
+from app.services.stt_cache import STTResultCache
+from app.services.broadcast_hub import BroadcastHub
+from app.services.session_registry import SessionRegistry
+from app.services.state_backend import create_state_backend
+from app.services.stt_pool import STTClientPool
+from app.services.transcript_store import TranscriptStore
+from app.services.transcription_jobs import TranscriptionJobs
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv()
+setup_logging(settings.LOG_LEVEL)
 
-app = FastAPI(title="ElevenLabs Scribe STT Backend")
+logger = logging.getLogger("app.main")
+
+async def warm_up(app: FastAPI):
+    """
+    Load the SDKs and build their clients ahead of the first request.
+    """
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(app.state.stt_pool.warm_up)
+        await google_meet.load_services()
+    except Exception as e:
+        logger.warning("Warm-up failed: %s", e)
+        return
+    logger.info("Warmed up in %.0f ms", (time.perf_counter() - started) * 1000)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One ElevenLabs client and connection pool for every session
+    app.state.stt_pool = STTClientPool()
+    app.state.stt_cache = STTResultCache() if settings.STT_CACHE_ENABLED else None
+    app.state.transcript_store = TranscriptStore(settings.TRANSCRIPT_DB_PATH)
+    app.state.transcription_jobs = TranscriptionJobs(
+        app.state.stt_pool, app.state.transcript_store, app.state.stt_cache
+    )
+    # Session ownership and meeting fan-out, shared with other workers
+    app.state.state_backend = create_state_backend()
+    app.state.sessions = SessionRegistry(
+        app.state.state_backend, transcription.active_sessions, transcription.serve_remote
+    )
+    await app.state.sessions.start()
+    # Meeting viewers on this worker, fed from the meeting channels
+    app.state.broadcast = BroadcastHub(app.state.state_backend, app.state.transcript_store)
+    metrics.Gauge("broadcast_meetings", "Meetings with viewers on this worker.", lambda: len(app.state.broadcast.meetings))
+    metrics.Gauge("broadcast_subscribers", "Meeting viewers on this worker.", lambda: app.state.broadcast.subscriber_count)
+    metrics.Gauge("stt_pool_active", "STT requests running on the shared pool.", lambda: app.state.stt_pool.active)
+    metrics.Gauge("stt_pool_waiting", "STT requests queued for a pool slot.", lambda: app.state.stt_pool.waiting)
+
+    if settings.WARM_UP == "blocking":
+        await warm_up(app)
+    elif settings.WARM_UP == "background":
+        app.state.warm_up = asyncio.create_task(warm_up(app))
+    yield
+    await app.state.broadcast.close()
+    await app.state.sessions.close()
+    await app.state.state_backend.close()
+    app.state.transcription_jobs.close()
+    app.state.stt_pool.close()
+    app.state.transcript_store.close()
+    google_meet.close()
+
+app = FastAPI(title="ElevenLabs Scribe STT Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,9 +81,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(TraceMiddleware)
+
 app.include_router(transcription.router)
 app.include_router(google_meet.router)
+app.include_router(search.router)
 
 @app.get("/")
 async def root():
     return {"message": "ElevenLabs Scribe STT Backend is running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Stage latencies, in-flight gauges and error counters for Prometheus.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,66 @@
+"""
+Checks that words parsed from a real SDK response keep their speakers.
+
+Builds a SpeechToTextChunkResponseModel the way the ElevenLabs SDK does,
+parses it like a live segment and runs it through speaker tracking.
+Exits 1 on the first mismatch:
+
+  python tests/check_stt_parsing.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elevenlabs.types import SpeechToTextChunkResponseModel
+
+from app.services.elevenlabs_service import ElevenLabsService
+from app.services.speaker_tracker import SpeakerTracker
+
+
+def response(words):
+    return SpeechToTextChunkResponseModel.model_validate({
+        "language_code": "en",
+        "language_probability": 1.0,
+        "text": "".join(word["text"] for word in words),
+        "words": words,
+    })
+
+
+def word(text, start, end, speaker, type="word"):
+    return {"text": text, "start": start, "end": end, "type": type, "speaker_id": speaker, "logprob": 0.0}
+
+
+def check(condition, message):
+    if not condition:
+        sys.exit(f"FAIL: {message}")
+
+
+def main():
+    service = ElevenLabsService()
+    segment = response([
+        word("hello", 0.0, 0.4, "speaker_0"),
+        word(" ", 0.4, 0.5, "speaker_0", type="spacing"),
+        word("hi", 0.6, 0.9, "speaker_1"),
+    ])
+
+    words = service.parse_words(segment, time_offset=10.0)
+    check([w.text for w in words] == ["hello", "hi"], f"spacing kept or words lost: {words}")
+    check([w.speaker_id for w in words] == ["speaker_0", "speaker_1"], f"speaker ids lost: {words}")
+    check(words[1].start == 10.6, f"offset not applied: {words[1]}")
+
+    # The next segment labels the same voices the other way round; the
+    # overlap with what was already assigned maps them back
+    tracker = SpeakerTracker()
+    first = tracker.assign(words, None, 10.0)
+    second = tracker.assign(service.parse_words(response([
+        word("hi", 0.6, 0.9, "speaker_0"),
+        word("again", 1.0, 1.4, "speaker_0"),
+    ]), time_offset=10.0), None, 10.0)
+    check(tracker.speaker_count == 2, f"expected 2 session speakers, got {tracker.speaker_count}")
+    check(second[0].speaker_id == first[1].speaker_id, f"overlap not matched: {first} / {second}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
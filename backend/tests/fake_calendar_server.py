@@ -0,0 +1,182 @@
+"""
+Local stand-in for the Google Calendar API, for exercising the
+google-meet endpoints without a Google account.
+
+Run it, then start the backend with
+GOOGLE_CALENDAR_API_ENDPOINT=http://localhost:8089/
+"""
+import argparse
+import datetime
+import email
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EVENTS_PATH = "/calendar/v3/calendars/primary/events"
+
+events = {}
+changes = {}  # event id -> change sequence number, for sync tokens
+sequence = 0
+lock = threading.Lock()
+latency = 0.0
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _changed(event_id):
+    global sequence
+    sequence += 1
+    changes[event_id] = sequence
+
+
+def _list(query):
+    """
+    Events list with paging; with a syncToken, only events changed since
+    the token was issued, cancelled ones included.
+    """
+    sync_token = query.get("syncToken", [None])[0]
+    if sync_token is not None:
+        if not sync_token.isdigit() or int(sync_token) > sequence:
+            return 410, {"error": {"code": 410, "message": "Sync token is no longer valid, a full sync is required."}}
+        items = [events[event_id] for event_id, seq in changes.items() if seq > int(sync_token)]
+    else:
+        items = [event for event in events.values() if event["status"] != "cancelled"]
+    items.sort(key=lambda event: event["start"]["dateTime"])
+
+    offset = int(query.get("pageToken", ["0"])[0])
+    page_size = int(query.get("maxResults", ["250"])[0])
+    result = {"kind": "calendar#events", "items": items[offset:offset + page_size]}
+    if offset + page_size < len(items):
+        result["nextPageToken"] = str(offset + page_size)
+    else:
+        result["nextSyncToken"] = str(sequence)
+    return 200, result
+
+
+def handle(method, path, body):
+    """
+    Serve one Calendar request; returns (status, json body).
+    """
+    url = urlparse(path)
+    if not url.path.startswith(EVENTS_PATH):
+        return 404, {"error": {"code": 404, "message": "Not Found"}}
+    event_id = url.path[len(EVENTS_PATH):].strip("/")
+
+    with lock:
+        if method == "POST" and not event_id:
+            event = json.loads(body or b"{}")
+            event_id = event.get("id") or uuid.uuid4().hex
+            if event_id in events:
+                return 409, {"error": {"code": 409, "message": "The requested identifier already exists."}}
+            code = event_id[:10]
+            event.update({
+                "id": event_id,
+                "status": "confirmed",
+                "updated": _now(),
+                "htmlLink": f"https://calendar.example/event?eid={event_id}",
+                "conferenceData": {
+                    "entryPoints": [{
+                        "entryPointType": "video",
+                        "uri": f"https://meet.google.com/{code[:3]}-{code[3:7]}-{code[7:10]}",
+                    }]
+                },
+            })
+            events[event_id] = event
+            _changed(event_id)
+            return 200, event
+
+        if method == "DELETE" and event_id:
+            if event_id not in events or events[event_id]["status"] == "cancelled":
+                return 410, {"error": {"code": 410, "message": "Resource has been deleted"}}
+            events[event_id].update({"status": "cancelled", "updated": _now()})
+            _changed(event_id)
+            return 204, None
+
+        if method == "GET" and event_id:
+            if event_id not in events:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            return 200, events[event_id]
+
+        if method == "GET":
+            return _list(parse_qs(url.query))
+
+    return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+
+def handle_batch(content_type, body):
+    """
+    Split a multipart/mixed batch, serve each part and build the reply.
+    """
+    message = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    boundary = "batch_" + uuid.uuid4().hex
+    out = []
+    for part in message.get_payload():
+        content_id = part["Content-ID"].strip("<>")
+        raw = part.get_payload(decode=True) or part.get_payload().encode()
+        head, _, payload = raw.replace(b"\r\n", b"\n").partition(b"\n\n")
+        method, path, _ = head.split(b"\n", 1)[0].decode().split(" ", 2)
+        status, result = handle(method, path, payload.strip())
+        out.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(result)}\r\n"
+        )
+    out.append(f"--{boundary}--\r\n")
+    return f"multipart/mixed; boundary={boundary}", "".join(out).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if latency:
+            time.sleep(latency)
+
+        if self.path.startswith("/batch/"):
+            content_type, payload = handle_batch(self.headers["Content-Type"], body)
+            self._reply(200, content_type, payload)
+            return
+
+        status, result = handle(self.command, self.path, body)
+        self._reply(status, "application/json; charset=UTF-8", json.dumps(result).encode() if result else b"")
+
+    do_GET = _serve
+    do_POST = _serve
+    do_DELETE = _serve
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    global latency
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+    latency = args.latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Fake Calendar API on http://127.0.0.1:{args.port}/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Local stand-in for Redis, enough of it for STATE_BACKEND_URL: GET, SET
+with EX/PX, DEL, PUBLISH and SUBSCRIBE. For running several backend
+workers that share sessions without installing Redis.
+
+Run it, then start each worker with
+STATE_BACKEND_URL=redis://127.0.0.1:6390/0
+"""
+import argparse
+import asyncio
+import time
+
+values = {}       # key -> (expires at or None, value)
+channels = {}     # channel -> {subscribed writer: its protocol version}
+
+
+class Push(list):
+    """Pub/sub message: a push frame in RESP3, an array in RESP2."""
+
+
+def encode(value, protocol=2):
+    if value is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, Exception):
+        return b"-ERR " + str(value).encode() + b"\r\n"
+    if isinstance(value, dict):
+        return b"%%%d\r\n" % len(value) + b"".join(encode(k, protocol) + encode(v, protocol) for k, v in value.items())
+    if isinstance(value, list):
+        kind = b">" if isinstance(value, Push) and protocol == 3 else b"*"
+        return kind + b"%d\r\n" % len(value) + b"".join(encode(item, protocol) for item in value)
+    return b"$%d\r\n" % len(value) + value + b"\r\n"
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+def get(key):
+    entry = values.get(key)
+    if entry is None:
+        return None
+    if entry[0] is not None and entry[0] <= time.monotonic():
+        del values[key]
+        return None
+    return entry[1]
+
+
+def execute(name, args, writer, subscribed, connection):
+    if name == b"PING":
+        return "PONG"
+    if name == b"HELLO":
+        if args:
+            connection["protocol"] = int(args[0])
+        return {"server": "fake-redis", "version": "7.0.0", "proto": connection["protocol"]}
+    if name in (b"CLIENT", b"SELECT"):
+        return "OK"
+    if name == b"GET":
+        return get(args[0])
+    if name == b"SET":
+        expires = None
+        options = [arg.upper() for arg in args[2:]]
+        if b"EX" in options:
+            expires = time.monotonic() + float(args[2 + options.index(b"EX") + 1])
+        if b"PX" in options:
+            expires = time.monotonic() + float(args[2 + options.index(b"PX") + 1]) / 1000
+        values[args[0]] = (expires, args[1])
+        return "OK"
+    if name == b"DEL":
+        return sum(values.pop(key, None) is not None for key in args)
+    if name == b"PUBLISH":
+        receivers = channels.get(args[0], {})
+        for receiver, protocol in receivers.items():
+            receiver.write(encode(Push([b"message", args[0], args[1]]), protocol))
+        return len(receivers)
+    if name == b"SUBSCRIBE":
+        replies = []
+        for channel in args:
+            channels.setdefault(channel, {})[writer] = connection["protocol"]
+            subscribed.add(channel)
+            replies.append(encode(Push([b"subscribe", channel, len(subscribed)]), connection["protocol"]))
+        return b"".join(replies)
+    if name == b"UNSUBSCRIBE":
+        replies = []
+        for channel in args or list(subscribed):
+            channels.get(channel, {}).pop(writer, None)
+            subscribed.discard(channel)
+            replies.append(encode(Push([b"unsubscribe", channel, len(subscribed)]), connection["protocol"]))
+        return b"".join(replies)
+    return Exception(f"unknown command '{name.decode()}'")
+
+
+async def handle(reader, writer):
+    subscribed = set()
+    connection = {"protocol": 2}
+    try:
+        while True:
+            command = await read_command(reader)
+            if command is None:
+                break
+            name, args = command[0].upper(), command[1:]
+            result = execute(name, args, writer, subscribed, connection)
+            # (Un)subscribe replies are already encoded, one per channel
+            writer.write(result if name in (b"SUBSCRIBE", b"UNSUBSCRIBE") else encode(result, connection["protocol"]))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        for channel in subscribed:
+            channels.get(channel, {}).pop(writer, None)
+        writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = await asyncio.start_server(handle, "127.0.0.1", args.port)
+    print(f"Fake Redis on redis://127.0.0.1:{args.port}/0", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Local stand-in for the ElevenLabs speech-to-text API, for load testing
+the backend offline.
+
+Run it, then start the backend with
+ELEVENLABS_BASE_URL=http://127.0.0.1:8090
+
+Every 0.4 s of audio louder than a quiet room comes back as one word.
+"""
+import argparse
+import email
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+STT_PATH = "/v1/speech-to-text"
+SAMPLE_RATE = 16000
+
+latency = 0.0
+jitter = 0.0
+error_rate = 0.0
+requests_served = 0
+lock = threading.Lock()
+
+
+def transcribe(pcm: bytes):
+    """
+    Fake transcript of 16-bit PCM: a word per 0.4 s of sound, one speaker.
+    """
+    samples = np.frombuffer(pcm[:len(pcm) // 2 * 2], dtype="<i2").astype(np.float32)
+    frame = SAMPLE_RATE // 100
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+    loud = np.sqrt(np.mean(frames * frames, axis=1)) > 200
+
+    words = []
+    index = 0
+    while index < len(loud):
+        if not loud[index]:
+            index += 1
+            continue
+        end = index
+        while end < len(loud) and loud[end]:
+            end += 1
+        for start in range(index, end - 9, 40):
+            if words:
+                words.append({"text": " ", "start": words[-1]["end"], "end": start / 100, "type": "spacing", "speaker_id": "speaker_0", "logprob": 0.0})
+            words.append({
+                "text": f"w{len(words) // 2}",
+                "start": start / 100,
+                "end": min(start + 40, end) / 100,
+                "type": "word",
+                "speaker_id": "speaker_0",
+                "logprob": 0.0,
+            })
+        index = end
+
+    return {
+        "language_code": "en",
+        "language_probability": 1.0,
+        "text": " ".join(word["text"] for word in words if word["type"] == "word"),
+        "words": words,
+    }
+
+
+def file_field(content_type, body):
+    """
+    The uploaded file's bytes from a multipart/form-data body.
+    """
+    message = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    for part in message.get_payload():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True)
+    return b""
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, result):
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        global requests_served
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.split("?")[0] != STT_PATH:
+            self._reply(404, {"detail": "Not Found"})
+            return
+
+        delay = max(0.0, random.gauss(latency, jitter)) if jitter else latency
+        time.sleep(delay)
+        with lock:
+            requests_served += 1
+
+        if random.random() < error_rate:
+            self._reply(random.choice([429, 500]), {"detail": {"status": "fake_error", "message": "Injected failure"}})
+            return
+        self._reply(200, transcribe(file_field(self.headers["Content-Type"], body)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    global latency, jitter, error_rate
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.3, help="mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.1, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    args = parser.parse_args()
+    latency, jitter, error_rate = args.latency, args.jitter, args.error_rate
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    server.daemon_threads = True
+    print(f"Fake STT API on http://127.0.0.1:{args.port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Load test for live transcription, runnable offline.
+
+Starts tests/fake_stt_server.py and the backend on local ports, then
+streams synthetic speech from N WebSocket clients at real-time pace and
+reports, for each level of N:
+
+  ttfw          time from a client's first audio to its first word
+  word latency  time from a word being spoken (its end in the stream) to
+                its arrival at the client, p50/p95/p99
+  loop lag      extra round-trip time of GET / against the idle server,
+                which is how long the backend's event loop was busy
+  memory        backend RSS growth per session
+  errors        error events and failed connections
+
+Max sessions is the largest N that met every SLO. With --check the
+exit status is 1 when the last level tried misses one, for CI:
+
+  python tests/load_test.py --sessions 5 10 --duration 20 --check
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.1
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def speech(seed: int, duration: float) -> bytes:
+    """
+    Bursts of voiced sound between short pauses, 16-bit PCM.
+    Seeded per client so no two streams are identical.
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    while total < duration * SAMPLE_RATE:
+        talk = int(rng.uniform(1.5, 3.0) * SAMPLE_RATE)
+        t = np.arange(talk) / SAMPLE_RATE
+        pitch = rng.uniform(110, 240)
+        voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        parts.append(voice * 3000 + rng.normal(0, 200, talk))
+        pause = int(rng.uniform(0.5, 1.0) * SAMPLE_RATE)
+        parts.append(rng.normal(0, 20, pause))
+        total += talk + pause
+    return np.clip(np.concatenate(parts), -32768, 32767).astype("<i2").tobytes()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    return float(np.percentile(values, q))
+
+
+class Client:
+    def __init__(self, index: int, url: str, duration: float, drain: float):
+        self.index = index
+        self.url = url
+        self.audio = speech(index, duration)
+        self.drain = drain
+        self.ttfw = None
+        self.latencies = []
+        self.errors = 0
+        self.failed = None
+
+    async def run(self):
+        try:
+            async with websockets.connect(self.url, max_size=None) as websocket:
+                session = json.loads(await websocket.recv())
+                assert session.get("type") == "session", session
+                started = time.monotonic()
+                receiver = asyncio.create_task(self._receive(websocket, started))
+
+                # Real-time pacing against the clock, not per-chunk sleeps,
+                # so a slow loop does not quietly slow the stream down
+                step = int(CHUNK_SECONDS * SAMPLE_RATE) * 2
+                for sent, offset in enumerate(range(0, len(self.audio), step)):
+                    await asyncio.sleep(max(0.0, started + sent * CHUNK_SECONDS - time.monotonic()))
+                    await websocket.send(self.audio[offset:offset + step])
+
+                # Let the last segments come back before hanging up
+                await asyncio.sleep(self.drain)
+                receiver.cancel()
+                await websocket.close()
+        except Exception as e:
+            self.failed = f"{type(e).__name__}: {e}"
+
+    async def _receive(self, websocket, started: float):
+        async for raw in websocket:
+            if isinstance(raw, bytes):
+                continue
+            arrived = time.monotonic() - started
+            message = json.loads(raw)
+            events = message.get("events", [message]) if message.get("type") == "batch" else [message]
+            for event in events:
+                if event.get("type") == "error":
+                    self.errors += 1
+                elif event.get("type") == "word" and event.get("end") is not None:
+                    if self.ttfw is None:
+                        self.ttfw = arrived
+                    self.latencies.append(arrived - event["end"])
+
+
+class LagProbe(threading.Thread):
+    """
+    GET / on a kept-alive connection every interval seconds, from a thread
+    of its own so the load generator's loop does not skew the timings.
+    """
+    def __init__(self, port: int, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.port = port
+        self.interval = interval
+        self.samples = []
+        self.running = True
+
+    def ping(self, connection) -> float:
+        began = time.perf_counter()
+        connection.request("GET", "/")
+        connection.getresponse().read()
+        return time.perf_counter() - began
+
+    def run(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        while self.running:
+            try:
+                self.samples.append(self.ping(connection))
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            time.sleep(self.interval)
+        connection.close()
+
+
+def rss(pid: int) -> int:
+    """
+    Resident memory of a process in bytes, from /proc.
+    """
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def wait_ready(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Process exited with status {process.returncode} before listening on port {port}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.1)
+    sys.exit(f"Nothing listening on port {port} after {timeout:.0f}s")
+
+
+async def run_level(args, sessions: int, backend: subprocess.Popen, idle_rtt: float):
+    url = f"ws://127.0.0.1:{args.port}/ws/transcribe?framing={args.framing}"
+    clients = [Client(index, url, args.duration, args.drain) for index in range(sessions)]
+    probe = LagProbe(args.port)
+    baseline = rss(backend.pid)
+    peak = baseline
+
+    async def watch_memory():
+        nonlocal peak
+        while True:
+            peak = max(peak, rss(backend.pid))
+            await asyncio.sleep(0.2)
+
+    probe.start()
+    watcher = asyncio.create_task(watch_memory())
+
+    async def staggered(client):
+        # Spread connects over a second, as real clients would not arrive together
+        await asyncio.sleep(args.ramp_up * client.index / sessions)
+        await client.run()
+
+    await asyncio.gather(*(staggered(client) for client in clients))
+    watcher.cancel()
+    probe.running = False
+    probe.join()
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    ttfws = [client.ttfw for client in clients if client.ttfw is not None]
+    lags = [max(0.0, sample - idle_rtt) for sample in probe.samples]
+    return {
+        "sessions": sessions,
+        "connected": sum(client.failed is None for client in clients),
+        "failures": [client.failed for client in clients if client.failed],
+        "words": len(latencies),
+        "ttfw_p50": percentile(ttfws, 50),
+        "ttfw_max": max(ttfws) if ttfws else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "lag_p99": percentile(lags, 99),
+        "lag_max": max(lags) if lags else None,
+        "memory_per_session": (peak - baseline) / sessions,
+        "errors": sum(client.errors for client in clients),
+        "silent_clients": sessions - len(ttfws),
+    }
+
+
+def violations(result, args):
+    """
+    SLOs the level missed, as readable reasons.
+    """
+    reasons = []
+    if result["failures"]:
+        reasons.append(f"{len(result['failures'])} connections failed")
+    if result["silent_clients"]:
+        reasons.append(f"{result['silent_clients']} clients got no words")
+    if result["errors"] > args.max_errors:
+        reasons.append(f"{result['errors']} error events")
+    if result["latency_p95"] is not None and result["latency_p95"] > args.slo_p95:
+        reasons.append(f"p95 word latency {result['latency_p95']:.2f}s > {args.slo_p95}s")
+    if result["ttfw_max"] is not None and result["ttfw_max"] > args.slo_ttfw:
+        reasons.append(f"time to first word {result['ttfw_max']:.2f}s > {args.slo_ttfw}s")
+    if result["lag_p99"] is not None and result["lag_p99"] > args.slo_lag:
+        reasons.append(f"p99 loop lag {result['lag_p99'] * 1000:.0f}ms > {args.slo_lag * 1000:.0f}ms")
+    return reasons
+
+
+def report(result, reasons):
+    def seconds(value):
+        return "-" if value is None else f"{value:.2f}s"
+
+    print(
+        f"{result['sessions']:>5} sessions  "
+        f"ttfw p50 {seconds(result['ttfw_p50'])} max {seconds(result['ttfw_max'])}  "
+        f"latency p50 {seconds(result['latency_p50'])} p95 {seconds(result['latency_p95'])} p99 {seconds(result['latency_p99'])}  "
+        f"lag p99 {(result['lag_p99'] or 0) * 1000:.0f}ms max {(result['lag_max'] or 0) * 1000:.0f}ms  "
+        f"mem {result['memory_per_session'] / 2**20:.1f}MiB/session  "
+        f"words {result['words']}  errors {result['errors']}",
+        flush=True,
+    )
+    for reason in reasons:
+        print(f"      SLO missed: {reason}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20, 40], help="concurrent clients per level, tried in order")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of audio each client streams")
+    parser.add_argument("--drain", type=float, default=5.0, help="seconds to wait for results after the audio ends")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which a level's clients connect")
+    parser.add_argument("--framing", default="word", choices=["word", "batch"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stt-port", type=int, default=8766)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--stt-jitter", type=float, default=0.1)
+    parser.add_argument("--stt-error-rate", type=float, default=0.0)
+    parser.add_argument("--slo-p95", type=float, default=3.0, help="max p95 word latency, seconds")
+    parser.add_argument("--slo-ttfw", type=float, default=5.0, help="max time to first word, seconds")
+    parser.add_argument("--slo-lag", type=float, default=0.1, help="max p99 event loop lag, seconds")
+    parser.add_argument("--max-errors", type=int, default=0, help="error events tolerated per level")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a level misses an SLO")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    env = dict(
+        os.environ,
+        ELEVENLABS_API_KEY="load-test",
+        ELEVENLABS_BASE_URL=f"http://127.0.0.1:{args.stt_port}",
+        # Every request should reach the fake API, and nothing is kept
+        STT_CACHE_ENABLED="false",
+        TRANSCRIPT_DB_PATH=os.path.join(workdir, "transcripts.db"),
+        JOBS_DIR=os.path.join(workdir, "jobs"),
+        CALENDAR_CACHE_PATH=os.path.join(workdir, "calendar_cache.json"),
+    )
+    fake_stt = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "tests", "fake_stt_server.py"),
+         "--port", str(args.stt_port), "--latency", str(args.stt_latency),
+         "--jitter", str(args.stt_jitter), "--error-rate", str(args.stt_error_rate)],
+        stdout=subprocess.DEVNULL,
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+    results = []
+    failed = False
+    try:
+        wait_ready(args.stt_port, fake_stt)
+        wait_ready(args.port, backend)
+        idle = LagProbe(args.port)
+        connection = http.client.HTTPConnection("127.0.0.1", args.port, timeout=5)
+        idle_rtt = statistics.median(idle.ping(connection) for _ in range(50))
+        connection.close()
+        print(f"Idle GET / round trip {idle_rtt * 1000:.1f}ms", flush=True)
+
+        max_sessions = 0
+        for sessions in args.sessions:
+            result = asyncio.run(run_level(args, sessions, backend, idle_rtt))
+            reasons = violations(result, args)
+            result["slo_missed"] = reasons
+            results.append(result)
+            report(result, reasons)
+            if reasons:
+                failed = True
+                break
+            max_sessions = sessions
+
+        print(f"Max sessions within SLO: {max_sessions}", flush=True)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"max_sessions": max_sessions, "levels": results}, f, indent=2)
+    finally:
+        for process in (backend, fake_stt):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Startup-time benchmark, runnable offline.
+
+For each run it starts a fresh worker and reports:
+
+  import      seconds to import main in a new interpreter
+  ready       seconds from spawning uvicorn to the first answered GET /
+  first word  seconds from sending a short utterance to its first word,
+              on the worker's first session (cold) and second (warm)
+
+STT goes to tests/fake_stt_server.py with no added latency, so the
+cold/warm gap is what loading the SDK costs the first caller. With
+--max-ready the exit status is 1 when median readiness is slower, for CI:
+
+  python tests/startup_benchmark.py --runs 5 --warm-up none background --max-ready 2.0
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+from load_test import BACKEND_DIR, speech, wait_ready
+
+
+def import_time() -> float:
+    code = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(count: int):
+    """
+    Modules with the largest cumulative import time, from -X importtime.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def wait_answered(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Worker exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.005)
+    sys.exit(f"Worker not ready after {timeout:.0f}s")
+
+
+async def first_word(port: int, seed: int) -> float:
+    # Speech then a pause, so the segment is cut as soon as it is all sent
+    audio = speech(seed, 1.5)
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/transcribe") as websocket:
+        await websocket.recv()  # session
+        started = time.monotonic()
+        for offset in range(0, len(audio), 3200):
+            await websocket.send(audio[offset:offset + 3200])
+        async for raw in websocket:
+            if json.loads(raw).get("type") == "word":
+                return time.monotonic() - started
+    raise RuntimeError("No words before the session closed")
+
+
+def run_once(args, warm_up: str, seed: int):
+    workdir = tempfile.mkdtemp(prefix="startup_benchmark_")
+    env = dict(
+        os.environ,
+        WARM_UP=warm_up,
+        ELEVENLABS_API_KEY="benchmark",
+        ELEVENLABS_BASE_URL=f"http://127.0.0.1:{args.stt_port}",
+        STT_CACHE_ENABLED="false",
+        TRANSCRIPT_DB_PATH=os.path.join(workdir, "transcripts.db"),
+        JOBS_DIR=os.path.join(workdir, "jobs"),
+        CALENDAR_CACHE_PATH=os.path.join(workdir, "calendar_cache.json"),
+    )
+    started = time.monotonic()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        wait_answered(args.port, worker)
+        ready = time.monotonic() - started
+        if warm_up == "background":
+            time.sleep(args.settle)  # what a pod gets between readiness and its first session
+        cold = asyncio.run(first_word(args.port, seed))
+        warm = asyncio.run(first_word(args.port, seed + 1))
+    finally:
+        worker.terminate()
+        try:
+            worker.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+    return ready, cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warm-up", nargs="+", default=["none", "background", "blocking"], choices=["none", "background", "blocking"])
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds between readiness and the first session with background warm-up")
+    parser.add_argument("--port", type=int, default=8775)
+    parser.add_argument("--stt-port", type=int, default=8776)
+    parser.add_argument("--slowest", type=int, default=10, help="list this many slowest imports")
+    parser.add_argument("--max-ready", type=float, help="fail if median readiness of any mode is slower, seconds")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    fake_stt = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "tests", "fake_stt_server.py"),
+         "--port", str(args.stt_port), "--latency", "0", "--jitter", "0"],
+        stdout=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        wait_ready(args.stt_port, fake_stt)
+
+        imports = [import_time() for _ in range(args.runs)]
+        results["import"] = statistics.median(imports)
+        print(f"import main      median {results['import']:.3f}s  (runs: {', '.join(f'{t:.3f}' for t in imports)})")
+        for cumulative, name in slowest_imports(args.slowest):
+            print(f"    {cumulative / 1e6:.3f}s  {name}")
+
+        for warm_up in args.warm_up:
+            runs = [run_once(args, warm_up, seed) for seed in range(args.runs)]
+            ready, cold, warm = (statistics.median(values) for values in zip(*runs))
+            results[warm_up] = {"ready": ready, "first_word_cold": cold, "first_word_warm": warm}
+            print(f"WARM_UP={warm_up:<11} ready {ready:.3f}s  first word cold {cold:.3f}s  warm {warm:.3f}s", flush=True)
+    finally:
+        fake_stt.terminate()
+        fake_stt.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_ready is not None:
+        slow = [mode for mode in args.warm_up if results[mode]["ready"] > args.max_ready]
+        if slow:
+            print(f"Readiness slower than {args.max_ready}s with WARM_UP={', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
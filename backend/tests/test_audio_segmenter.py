@@ -0,0 +1,87 @@
+import numpy as np
+
+from app.services.audio_segmenter import FixedSegmenter, PcmRingBuffer, VadSegmenter
+
+RATE = 16000
+
+
+def tone(seconds: float, amplitude: int = 4000) -> bytes:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sin(2 * np.pi * 180 * t) * amplitude).astype("<i2").tobytes()
+
+
+def silence(seconds: float) -> bytes:
+    return bytes(int(seconds * RATE) * 2)
+
+
+def feed(segmenter, audio: bytes, chunk: int = 3200):
+    segments = []
+    for offset in range(0, len(audio), chunk):
+        segments.extend(segmenter.feed(audio[offset:offset + chunk]))
+    return segments
+
+
+def test_lease_survives_relocation():
+    ring = PcmRingBuffer(100)
+    ring.write(bytes(range(60)))
+    segment = ring.lease(0, 60)
+    ring.discard_until(40)
+
+    # The write wraps while the front is leased: the held audio moves to a new buffer
+    old = ring._buf
+    ring.write(bytes(range(100, 150)))
+    assert ring._buf is not old
+    assert bytes(segment.audio) == bytes(range(60))
+    assert bytes(ring.view(40, 110)) == bytes(range(40, 60)) + bytes(range(100, 150))
+
+
+def test_relocation_reuses_buffer_once_released():
+    ring = PcmRingBuffer(100)
+    ring.write(bytes(60))
+    ring.lease(0, 60).release()
+    ring.discard_until(40)
+
+    old = ring._buf
+    ring.write(bytes(range(50)))
+    assert ring._buf is old
+    assert bytes(ring.view(60, 110)) == bytes(range(50))
+
+
+def test_fixed_segmenter_holds_every_in_flight_segment():
+    segmenter = FixedSegmenter(RATE, buffer_duration=1.0, overlap_duration=0.25, max_in_flight=3)
+    buffer = segmenter._ring._buf
+    chunk = tone(1.0)
+    in_flight = []
+    for _ in range(60):
+        # As in the pipeline: the oldest segment is done before more audio is read
+        if len(in_flight) >= 3:
+            in_flight.pop(0).release()
+        in_flight.extend(segmenter.feed(chunk))
+    assert segmenter._ring._buf is buffer
+
+
+def test_vad_splits_at_max_segment_with_overlap():
+    segmenter = VadSegmenter(max_segment=2.0, overlap_duration=0.5)
+    audio = tone(5.0)
+    segments = feed(segmenter, audio)
+
+    assert len(segments) == 2
+    # Cut at the first frame boundary that reaches max_segment
+    for segment in segments:
+        assert segmenter.max_segment_bytes <= len(segment.audio) < segmenter.max_segment_bytes + segmenter.frame_bytes
+
+    # The second segment starts overlap_duration before the first one ended
+    first, second = segments
+    overlap = segmenter.overlap_size
+    assert second.start_sample == first.start_sample + (len(first.audio) - overlap) // 2
+    assert bytes(second.audio[:overlap]) == bytes(first.audio[-overlap:])
+
+
+def test_vad_cuts_at_pause():
+    segmenter = VadSegmenter()
+    segments = feed(segmenter, tone(1.5) + silence(1.0) + tone(1.5) + silence(1.0))
+
+    assert len(segments) == 2
+    assert segments[0].start_sample < 1.5 * RATE
+    assert 2.5 * RATE - 0.3 * RATE <= segments[1].start_sample < 2.5 * RATE
+    assert segmenter.flush() is None
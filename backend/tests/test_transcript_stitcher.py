@@ -0,0 +1,38 @@
+from app.models.transcript import Word
+from app.services.transcript_stitcher import TranscriptStitcher
+
+
+def words(*entries):
+    return [Word(text=text, start=start, end=end) for text, start, end in entries]
+
+
+def test_drops_words_repeated_in_overlap():
+    stitcher = TranscriptStitcher(overlap_duration=0.5)
+    first = stitcher.stitch(words(("hello", 3.0, 3.4), ("there", 3.5, 3.9), ("again", 4.5, 4.9)))
+    assert [word.text for word in first] == ["hello", "there", "again"]
+
+    # The next segment starts 0.5 s before the first ended and hears "again" too
+    second = stitcher.stitch(words(("again.", 4.52, 4.88), ("next", 5.0, 5.3), ("words", 5.4, 5.8)))
+    assert [word.text for word in second] == ["next", "words"]
+    assert stitcher.last_end == 5.8
+
+
+def test_drops_unaligned_words_inside_covered_audio():
+    stitcher = TranscriptStitcher(overlap_duration=0.5)
+    stitcher.stitch(words(("one", 0.0, 0.4), ("two", 0.5, 1.0)))
+
+    # A differently recognized word over audio already covered is dropped
+    second = stitcher.stitch(words(("too", 0.6, 0.9), ("three", 1.1, 1.5)))
+    assert [word.text for word in second] == ["three"]
+
+
+def test_interim_words_are_not_committed():
+    stitcher = TranscriptStitcher(overlap_duration=0.5)
+    stitcher.stitch(words(("one", 0.0, 0.4)))
+
+    interim = stitcher.stitch(words(("two", 0.5, 0.9)), commit=False)
+    assert [word.text for word in interim] == ["two"]
+    assert stitcher.last_end == 0.4
+
+    final = stitcher.stitch(words(("two", 0.5, 0.9), ("three", 1.0, 1.4)))
+    assert [word.text for word in final] == ["two", "three"]
@@ -81,9 +81,9 @@ export const useLiveTranscription = ({
             audioStreamRef.current = null;
         }
 
-        // Close WebSocket
+        // Close WebSocket; 1000 tells the server the session is finished
         if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-            wsRef.current.close();
+            wsRef.current.close(1000);
         }
 
         setIsConnected(false);